@@ -0,0 +1,171 @@
+import json
+import threading
+import time
+import numpy as np
+import pandas as pd
+from modules.query_builder import PRIMARY_KEYS, QueryBuilder, Response
+MAX_ROWS = 1000  # postgrest's default cap on rows per select
+
+# --- Fake client ---
+# an in-process stand-in for the parts of supabase-py's table(...) builder that
+# supabase_db uses. tables are dataframes kept sorted by primary key, so id range
+# filters (paged loading) are binary searches instead of full scans. with wire=True
+# every response goes through a json round trip like the real client's would, and
+# latency adds a fixed delay per request.
+class FakeSupabase:
+    def __init__(self, latency=0.0, wire=True, max_rows=MAX_ROWS):
+        self.tables = {}
+        self.next_ids = {}
+        self.latency = latency
+        self.wire = wire
+        self.max_rows = max_rows
+        self.requests = 0
+        self.lock = threading.RLock()
+
+    def table(self, name):
+        return _Query(self, name)
+
+    def load(self, name, df):
+        # bulk-loads a table without going through insert requests
+        key = PRIMARY_KEYS.get(name, "id")
+        df = df.copy()
+        if key == "id" and "id" not in df.columns:
+            df.insert(0, "id", np.arange(1, len(df) + 1, dtype="int64"))
+        with self.lock:
+            self.tables[name] = df.sort_values(key, ignore_index=True)
+            if key == "id":
+                self.next_ids[name] = int(df["id"].max()) + 1 if len(df) else 1
+
+    def frame(self, name):
+        with self.lock:
+            return self.tables.setdefault(name, pd.DataFrame())
+
+    def _respond(self, rows, count=None):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.wire:
+            rows = json.loads(json.dumps(rows, default=str))
+        return Response(rows, count)
+
+def _records(df):
+    if df.empty:
+        return []
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+class _Query(QueryBuilder):
+    # --- execution ---
+    def _mask(self, df):
+        mask = np.ones(len(df), dtype=bool)
+        for op, column, value in self.filters:
+            if column not in df.columns:
+                return np.zeros(len(df), dtype=bool)
+            values = df[column]
+            if op == "eq":
+                mask &= (values == value).to_numpy()
+            elif op == "neq":
+                mask &= (values != value).to_numpy()
+            elif op == "gt":
+                mask &= (values > value).fillna(False).to_numpy(dtype=bool)
+            elif op == "gte":
+                mask &= (values >= value).fillna(False).to_numpy(dtype=bool)
+            elif op == "lt":
+                mask &= (values < value).fillna(False).to_numpy(dtype=bool)
+            elif op == "lte":
+                mask &= (values <= value).fillna(False).to_numpy(dtype=bool)
+            elif op == "in":
+                mask &= values.isin(value).to_numpy()
+            elif op == "ilike":
+                pattern = value.strip("%").lower()
+                mask &= values.fillna("").astype(str).str.lower().str.contains(pattern, regex=False).to_numpy()
+        return mask
+
+    def _key_slice(self, df):
+        # narrows to the primary key range with a binary search before masking
+        if df.empty or self.key not in df.columns:
+            return df
+        keys = df[self.key].to_numpy()
+        start, stop = 0, len(df)
+        for op, column, value in self.filters:
+            if column != self.key:
+                continue
+            if op == "gt":
+                start = max(start, np.searchsorted(keys, value, side="right"))
+            elif op == "gte":
+                start = max(start, np.searchsorted(keys, value, side="left"))
+            elif op == "lt":
+                stop = min(stop, np.searchsorted(keys, value, side="left"))
+            elif op == "lte":
+                stop = min(stop, np.searchsorted(keys, value, side="right"))
+        return df.iloc[start:max(start, stop)]
+
+    def execute(self):
+        with self.client.lock:
+            return super().execute()
+
+    def _select(self):
+        df = self._key_slice(self.client.frame(self.table))
+        df = df[self._mask(df)]
+        count = len(df) if self.count else None
+        if self.orders and self.orders != [(self.key, False)]:
+            columns = [column for column, _ in self.orders if column in df.columns]
+            ascending = [not desc for column, desc in self.orders if column in df.columns]
+            df = df.sort_values(columns, ascending=ascending, kind="stable")
+        limit = self.client.max_rows if self.row_limit is None else min(self.row_limit, self.client.max_rows)
+        df = df.iloc[self.offset:self.offset + limit]
+        if self.columns != "*":
+            df = df[[column for column in self.columns.split(",") if column in df.columns]]
+        return self.client._respond(_records(df), count)
+
+    def _insert(self):
+        rows = pd.DataFrame(self.payload)
+        if self.key == "id":
+            start = self.client.next_ids.get(self.table, 1)
+            rows.insert(0, "id", np.arange(start, start + len(rows), dtype="int64"))
+            self.client.next_ids[self.table] = start + len(rows)
+        self._store(pd.concat([self.client.frame(self.table), rows], ignore_index=True))
+        return self.client._respond(_records(rows))
+
+    def _upsert(self):
+        df = self.client.frame(self.table)
+        rows = pd.DataFrame(self.payload)
+        key = self.on_conflict
+        if not df.empty and key in rows.columns:
+            existing = df.set_index(key)
+            incoming = rows.set_index(key)
+            updated = existing.index.intersection(incoming.index)
+            # like postgres, a null in the payload overwrites the stored value
+            existing = existing.astype(object)
+            existing.loc[updated, incoming.columns] = incoming.loc[updated].astype(object)
+            new = incoming.loc[~incoming.index.isin(existing.index)].reset_index()
+            df = existing.reset_index()
+        else:
+            new = rows
+        if self.key == "id" and "id" not in new.columns and len(new):
+            start = self.client.next_ids.get(self.table, 1)
+            new.insert(0, "id", np.arange(start, start + len(new), dtype="int64"))
+            self.client.next_ids[self.table] = start + len(new)
+        self._store(pd.concat([df, new], ignore_index=True))
+        stored = self.client.frame(self.table)
+        return self.client._respond(_records(stored[stored[key].isin(rows[key])]))
+
+    def _update(self):
+        df = self.client.frame(self.table).copy()
+        mask = self._mask(df)
+        for column, value in self.payload.items():
+            if column not in df.columns:
+                df[column] = None
+            df.loc[mask, column] = value
+        self._store(df)
+        return self.client._respond(_records(df[mask]))
+
+    def _delete(self):
+        df = self.client.frame(self.table)
+        mask = self._mask(df)
+        self._store(df[~mask])
+        return self.client._respond(_records(df[mask]))
+
+    def _store(self, df):
+        if self.key in df.columns:
+            df = df.sort_values(self.key, ignore_index=True)
+        self.client.tables[self.table] = df.reset_index(drop=True)
@@ -0,0 +1,224 @@
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# benchmarks never touch disk snapshots or a real supabase; set before the app modules read them
+os.environ.setdefault("BUDGET_TRACKER_SNAPSHOT", "0")
+os.environ.setdefault("BUDGET_TRACKER_WARM_UP", "0")
+
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+from benchmarks.fake_supabase import FakeSupabase
+from benchmarks.synthetic import generate_transactions, generate_budgets, generate_tags
+from modules import supabase_db as db
+from modules.analytics import budget_trends
+from modules.rollups import budget_vs_actual
+from modules.sqlite_backend import SQLiteClient
+
+DEFAULT_SIZES = "1k,100k,1m"
+DELTA_ROWS = 100
+LOAD_CHUNK = 50_000
+LAST_YEAR = ("2025-01-01", "2025-12-31")  # the synthetic histories end on 2025-12-31
+LAST_MONTHS = ("2025-01", "2025-12")
+
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+# --- Setup ---
+def build_client(n, seed=0, latency=0.0, backend="fake"):
+    transactions = generate_transactions(n, seed=seed)
+    tables = {"transactions": transactions, "budgets": generate_budgets(transactions, seed=seed), "tags": generate_tags()}
+    if backend == "sqlite":
+        client = SQLiteClient(":memory:")
+        for name, df in tables.items():
+            for start in range(0, len(df), LOAD_CHUNK):
+                client.table(name).insert(df.iloc[start:start + LOAD_CHUNK].to_dict("records")).execute()
+        return client
+    client = FakeSupabase(latency=latency)
+    for name, df in tables.items():
+        client.load(name, df)
+    return client
+
+def requests_made(client):
+    # only the fake counts requests; the sqlite backend reports 0
+    return getattr(client, "requests", 0)
+
+def cold():
+    # drops every cache and the process-wide transactions frame
+    db._transaction_sync.reset()
+    db.invalidate()
+
+# --- Benchmarks ---
+# each benchmark is (name, setup, fn): setup runs untimed before every repeat.
+def data_benchmarks(client):
+    latest = lambda: db.get_rollup().months()[-1]
+    months = {}
+    seeds = itertools.count(1)
+
+    def insert_delta():
+        rows = generate_transactions(DELTA_ROWS, months=1, seed=next(seeds))
+        client.table("transactions").insert(rows.to_dict("records")).execute()
+        db.invalidate("transactions")
+
+    def overview():
+        rollup = db.get_rollup()
+        month = months.setdefault("latest", latest())
+        rollup.totals(month)
+        rollup.by_category(month, "expense")
+        budget_vs_actual(db.load_budget(month), rollup, month)
+
+    return [
+        ("load_transactions (cold)", cold, db.load_transactions),
+        ("load_transactions (warm)", None, db.load_transactions),
+        (f"load_transactions (delta +{DELTA_ROWS})", insert_delta, db.load_transactions),
+        ("get_rollup (no changes)", lambda: db.invalidate("transactions"), db.get_rollup),
+        ("overview aggregations", lambda: db.invalidate("budgets"), overview),
+        ("get_transaction_bounds", lambda: db.invalidate("transactions"), db.get_transaction_bounds),
+        ("count_transactions (last year)", lambda: db.invalidate("transactions"),
+         lambda: db.count_transactions(*LAST_YEAR)),
+        ("query_transactions (page of 50)", lambda: db.invalidate("transactions"),
+         lambda: db.query_transactions(*LAST_YEAR, order="amount", desc=True, limit=50)),
+        ("search_transactions (\"cafe 4\")", lambda: db.invalidate("transactions"),
+         lambda: db.query_transactions(*LAST_YEAR, order="relevance", limit=50, search="cafe 4")),
+        ("get_table_data transactions", lambda: db.invalidate("transactions"),
+         lambda: db.get_table_data("transactions")),
+        ("get_all_budget_months", lambda: db.invalidate("budgets"), db.get_all_budget_months),
+        ("budget trends (12 months)", lambda: db.invalidate("budgets"),
+         lambda: budget_trends(db.load_budgets(*LAST_MONTHS), db.get_rollup(), *LAST_MONTHS)),
+    ]
+
+def _render_tab():
+    # runs as an AppTest script; the tab to render comes from session state
+    import streamlit as st
+    from modules.supabase_db import load_tags, get_rollup, get_transaction_bounds, get_all_budget_months, get_table_data
+    from modules.ui import render_overview_tab, render_transaction_tab, render_budget_tab, render_database_tab
+
+    tab = st.session_state["bench_tab"]
+    if tab == "overview":
+        render_overview_tab(get_rollup())
+    elif tab == "transactions":
+        render_transaction_tab(get_transaction_bounds())
+    elif tab == "budget":
+        render_budget_tab(load_tags(), get_rollup(), get_all_budget_months())
+    else:
+        render_database_tab(load_tags(), "transactions", get_table_data("transactions"))
+
+def render_benchmarks():
+    # data is warm, so this is the cost of a rerun building the page: pandas, altair and widgets
+    apps = {}
+
+    def setup(tab):
+        def prepare():
+            app = AppTest.from_function(_render_tab, default_timeout=600)
+            app.session_state["bench_tab"] = tab
+            apps[tab] = app.run()  # the first run fills the caches; the timed one is a rerun
+        return prepare
+
+    def render(tab):
+        def run():
+            app = apps[tab].run()
+            if app.exception:
+                raise RuntimeError(app.exception[0].value)
+        return run
+
+    return [(f"render {tab} tab", setup(tab), render(tab)) for tab in ["overview", "transactions", "budget", "database"]]
+
+def time_benchmark(client, setup, fn, repeat):
+    timings = []
+    requests = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        before = requests_made(client)
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+        requests.append(requests_made(client) - before)
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "requests": max(requests),
+        "repeat": repeat,
+    }
+
+# --- Report ---
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+def run(sizes, repeat, latency=0.0, render=True, backend="fake", log=print):
+    report = {
+        "at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "backend": backend,
+        "latency": latency,
+        "results": [],
+    }
+    for size in sizes:
+        n = parse_size(size)
+        log(f"-- {size}: generating {n} transactions")
+        client = build_client(n, latency=latency, backend=backend)
+        db.set_client(client)
+        cold()
+        benchmarks = data_benchmarks(client) + (render_benchmarks() if render else [])
+        for name, setup, fn in benchmarks:
+            result = time_benchmark(client, setup, fn, repeat)
+            report["results"].append({"size": size, "rows": n, "benchmark": name, **result})
+            log(f"{size:>6}  {name:<40} {result['median'] * 1000:>10.1f} ms  {result['requests']:>6} req")
+    return report
+
+def compare(report, baseline, threshold):
+    # a benchmark regresses when its median is over threshold x the baseline's
+    previous = {(r["size"], r["benchmark"]): r for r in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        before = previous.get((result["size"], result["benchmark"]))
+        if before is None or not before["median"]:
+            continue
+        ratio = result["median"] / before["median"]
+        flag = "REGRESSED" if ratio > threshold else ""
+        print(f"{result['size']:>6}  {result['benchmark']:<40} {before['median'] * 1000:>10.1f} -> "
+              f"{result['median'] * 1000:>10.1f} ms  x{ratio:.2f} {flag}")
+        if flag:
+            regressions.append(result)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="time the app's data and render paths against a fake supabase")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated transaction counts, e.g. 1k,100k,1m")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--backend", choices=["fake", "sqlite"], default="fake",
+                        help="fake supabase over json, or the embedded sqlite backend")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every fake request")
+    parser.add_argument("--no-render", action="store_true", help="skip the headless tab renders")
+    parser.add_argument("--out", help="write the report as json to this path")
+    parser.add_argument("--compare", help="a previous json report to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes.split(","), args.repeat, args.latency, render=not args.no_render, backend=args.backend)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
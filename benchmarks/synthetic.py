@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+TAGS = {
+    "rent": "#FF6B6B",
+    "food": "#6BCB77",
+    "utils": "#4D96FF",
+    "wifey": "#FFB347",
+    "personal": "#A66DD4",
+    "health": "#FF7F50",
+    "subscriptions": "#20B2AA",
+    "miscellaneous": "#A9A9A9",
+}
+
+# share of expense rows and (median, spread) of a lognormal amount per category
+EXPENSES = {
+    "food": (0.42, 18.0, 0.7),
+    "personal": (0.16, 35.0, 0.9),
+    "miscellaneous": (0.12, 25.0, 1.0),
+    "wifey": (0.10, 40.0, 0.8),
+    "subscriptions": (0.08, 14.0, 0.4),
+    "health": (0.05, 60.0, 0.9),
+    "utils": (0.04, 90.0, 0.3),
+    "rent": (0.03, 1800.0, 0.05),
+}
+INCOME_SHARE = 0.04
+WORDS = ["grocer", "cafe", "market", "pharmacy", "transit", "online", "hydro", "landlord", "bistro", "store"]
+
+# --- Synthetic history ---
+# a seeded, realistic-looking history: mostly small food and personal spending, a
+# few large monthly bills and paychecks, spread over one to twenty years so a month
+# holds tens to thousands of rows depending on the size.
+def months_for(n):
+    return int(min(max(12, n // 300), 240))
+
+def generate_transactions(n, months=None, seed=0, end="2025-12-31"):
+    rng = np.random.default_rng(seed)
+    months = months or months_for(n)
+    end = pd.Timestamp(end)
+    start = (end - pd.DateOffset(months=months)) + pd.Timedelta(days=1)
+    days = (end - start).days + 1
+
+    is_income = rng.random(n) < INCOME_SHARE
+    categories = np.array(list(EXPENSES))
+    weights = np.array([share for share, _, _ in EXPENSES.values()])
+    category = categories[rng.choice(len(categories), size=n, p=weights / weights.sum())]
+    median = pd.Series(category).map({name: median for name, (_, median, _) in EXPENSES.items()}).to_numpy()
+    spread = pd.Series(category).map({name: spread for name, (_, _, spread) in EXPENSES.items()}).to_numpy()
+    amount = np.round(median * np.exp(rng.normal(0, spread)), 2)
+    amount = np.where(is_income, np.round(rng.normal(2600, 300, n), 2), amount)
+    category = np.where(is_income, "miscellaneous", category)
+
+    dates = start + pd.to_timedelta(np.sort(rng.integers(0, days, n)), unit="D")
+    description = np.char.add(np.array(WORDS)[rng.integers(0, len(WORDS), n)], " #")
+    description = np.char.add(description, rng.integers(1, 500, n).astype(str))
+    description = np.where(rng.random(n) < 0.1, None, description)
+
+    return pd.DataFrame({
+        "date": dates.strftime("%Y-%m-%d"),
+        "category": category,
+        "description": description,
+        "amount": np.abs(amount),
+        "type": np.where(is_income, "income", "expense"),
+    })
+
+def generate_budgets(transactions, seed=0):
+    # one budget row per month and expense category, near that month's actual spend
+    rng = np.random.default_rng(seed)
+    expenses = transactions[transactions["type"] == "expense"]
+    budgets = (
+        expenses.assign(month=expenses["date"].str[:7])
+                .groupby(["month", "category"], as_index=False)["amount"].sum()
+    )
+    budgets["amount"] = np.round(budgets["amount"] * rng.uniform(0.8, 1.3, len(budgets)), -1)
+    return budgets
+
+def generate_tags():
+    return pd.DataFrame({"name": list(TAGS), "color": list(TAGS.values())})
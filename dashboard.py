@@ -1,26 +1,66 @@
 import streamlit as st
 from modules.auth import check_password
-from modules.supabase_db import load_transactions, load_tags
+from modules.supabase_db import (
+    load_tags, is_offline, prefetch, pop_failed_writes, warm_up, start_change_feed,
+    get_rollup, get_transaction_bounds, get_all_budget_months, get_table_data,
+)
 from modules.ui import (
     render_overview_tab,
     render_transaction_tab,
     render_budget_tab,
     render_database_tab,
+    render_perf_panel,
+    start_rerun_recording,
+    finish_rerun_recording,
 )
+from modules import perf
+
+TABS = ["overview", "transactions", "budget", "database"]
+
+# --- Connect ---
+# runs once per process; opens the supabase connection while the login renders and
+# starts following other processes' writes
+warm_up()
+start_change_feed()
 
 # --- Authenticate ---
 check_password()
 
-# --- Load shared data ---
-tags = load_tags()
-df = load_transactions()
-
 # --- Streamlit Config ---
 st.set_page_config(page_title="tpbt", layout="wide")
 st.title("tp budget tracker")
 
+# --- Setup Tabs ---
+# only the open tab is rendered, so its reads are the only ones fetched
+active_tab = st.radio("view", TABS, horizontal=True, key="active_tab", label_visibility="collapsed")
+
+# --- Perf ---
+if st.query_params.get("perf") == "1":
+    st.session_state["perf_panel"] = True
+rerun = start_rerun_recording(active_tab)
+
+# --- Load shared data ---
+# every read the page needs goes out at once; missing results render as "loading"
+db_table = st.session_state.get("db_table", "transactions")
+tab_reads = {
+    "overview": {"rollup": (get_rollup,)},
+    "transactions": {"bounds": (get_transaction_bounds,)},
+    "budget": {"rollup": (get_rollup,), "budget_months": (get_all_budget_months,)},
+    "database": {"table": (get_table_data, db_table)},
+}
+with perf.section("prefetch"):
+    data = prefetch({"tags": (load_tags,), **tab_reads[active_tab]})
+tags = data["tags"]
+
+for write, error in pop_failed_writes():
+    st.error(f"❌ couldn't save a change to `{write.table}` ({write.op}), it has been rolled back: {error}")
+
+if is_offline():
+    st.warning("📴 can't reach supabase – showing the last local snapshot, changes are disabled.")
+
 # --- Initialize Default Tags (if missing) ---
-if not tags:
+# None means the read timed out, not that the table is empty
+if tags is not None and not tags and not is_offline():
     tags = {
         "rent": "#FF6B6B",
         "food": "#6BCB77",
@@ -31,22 +71,19 @@ if not tags:
         "subscriptions": "#20B2AA",
         "miscellaneous": "#A9A9A9",
     }
-    from modules.supabase_db import insert_or_update_tag
-    for name, color in tags.items():
-        insert_or_update_tag(name, color)
-
-# --- Setup Tabs ---
-tab0, tab1, tab2, tab3 = st.tabs(["overview", "transactions", "budget", "database"])
-
-# --- Render Each Tab ---
-with tab0:
-    render_overview_tab()
-
-with tab1:
-    render_transaction_tab(df)
+    from modules.supabase_db import upsert_tags
+    upsert_tags(tags)
 
-with tab2:
-    render_budget_tab(df, tags)
+# --- Render Active Tab ---
+if active_tab == "overview":
+    render_overview_tab(data["rollup"])
+elif active_tab == "transactions":
+    render_transaction_tab(data["bounds"])
+elif active_tab == "budget":
+    render_budget_tab(tags, data["rollup"], data["budget_months"])
+else:
+    render_database_tab(tags, db_table, data["table"])
 
-with tab3:
-    render_database_tab(tags)
\ No newline at end of file
+finish_rerun_recording(rerun)
+if st.session_state.get("perf_panel"):
+    render_perf_panel()
@@ -0,0 +1,98 @@
+import datetime
+import numpy as np
+import pandas as pd
+
+ROLLING_MONTHS = 3
+
+# --- Budget trends ---
+# budget against actual for a whole range of months at once. actual spending comes
+# from the month x category rollup and budgets from one range read, both pivoted to
+# month x category grids, so rolling means, year-over-year deltas and the run-rate
+# forecast are column operations instead of a loop over months.
+def _months(start, end):
+    return pd.period_range(pd.Period(start, freq="M"), pd.Period(end, freq="M"), freq="M")
+
+def monthly_expenses(rollup, start, end):
+    # month x category grid of expense totals in dollars: zero where nothing was
+    # spent, NaN for months before the first transaction
+    months = _months(start, end)
+    if rollup.empty or "expense" not in rollup.table.index.get_level_values("type"):
+        return pd.DataFrame(index=months, dtype="float64")
+    cents = rollup.table["cents"].xs("expense", level="type")
+    grid = cents.unstack("category", fill_value=0) / 100
+    grid.index = pd.PeriodIndex(grid.index, freq="M")
+    grid = grid.reindex(months, fill_value=0.0)
+    first = pd.Period(min(rollup.months()), freq="M")
+    grid.loc[grid.index < first] = np.nan
+    return grid
+
+def monthly_budgets(budgets, start, end):
+    months = _months(start, end)
+    if budgets is None or budgets.empty:
+        return pd.DataFrame(index=months, dtype="float64")
+    grid = budgets.groupby(["month", "category"])["amount"].sum().unstack("category", fill_value=0.0)
+    grid.index = pd.PeriodIndex(grid.index, freq="M")
+    return grid.reindex(months, fill_value=0.0)
+
+def run_rate(actual, months, today=None):
+    # the month containing today is projected to month end at its daily rate so far
+    today = today or datetime.date.today()
+    current = pd.Period(today, freq="M")
+    forecast = actual.copy()
+    if current in months:
+        forecast.loc[current] = actual.loc[current] / today.day * current.days_in_month
+    return forecast
+
+def budget_trends(budgets, rollup, start, end, window=ROLLING_MONTHS, today=None):
+    months = _months(start, end)
+    # enough history before start for the first month's rolling mean and last year
+    actual = monthly_expenses(rollup, months[0] - 12 - (window - 1), months[-1])
+    budgeted = monthly_budgets(budgets, months[0], months[-1])
+    categories = budgeted.columns.union(actual.columns)
+    before_data = actual.isna().all(axis=1) & (len(actual.columns) > 0)
+    actual = actual.reindex(columns=categories, fill_value=0.0)
+    actual.loc[before_data] = np.nan
+    budgeted = budgeted.reindex(columns=categories, fill_value=0.0)
+
+    grids = {
+        "budgeted": budgeted,
+        "actual": actual.loc[months],
+        "rolling_actual": actual.rolling(window, min_periods=1).mean().loc[months],
+        "last_year_actual": actual.shift(12).loc[months],
+        "forecast": run_rate(actual.loc[months], months, today),
+    }
+    if categories.empty:
+        return pd.DataFrame(columns=["month", "category", *grids])
+    trends = pd.concat(
+        {name: grid.rename_axis(index="month", columns="category").stack(future_stack=True)
+         for name, grid in grids.items()},
+        axis=1,
+    ).reset_index()
+    # months before the first transaction are nan, and nan != 0, so they count as empty
+    trends = trends[(trends["budgeted"] != 0) | (trends["actual"].fillna(0) != 0)].reset_index(drop=True)
+    trends["month"] = trends["month"].astype(str)
+
+    has_budget = trends["budgeted"].where(trends["budgeted"] > 0)
+    trends["difference"] = trends["budgeted"] - trends["actual"]
+    trends["pct_used"] = trends["actual"] / has_budget
+    trends["forecast_difference"] = trends["budgeted"] - trends["forecast"]
+    trends["yoy_delta"] = trends["actual"] - trends["last_year_actual"]
+    trends["yoy_pct"] = trends["yoy_delta"] / trends["last_year_actual"].where(trends["last_year_actual"] > 0)
+    return trends
+
+def monthly_totals(trends):
+    # the trends summed over categories, one row per month
+    columns = ["budgeted", "actual", "rolling_actual", "last_year_actual", "forecast"]
+    return trends.groupby("month", as_index=False)[columns].sum(min_count=1)
+
+# --- Progress labels ---
+def progress_labels(categories, spent, budget):
+    # the overview's per-category budget lines, built for all categories at once
+    used = (spent / budget.where(budget > 0)).fillna(0.0)
+    progress = used.clip(upper=1.0)
+    left = ((1.0 - progress).clip(lower=0) * 100).round().astype(int).astype(str)
+    over = ((used - 1.0) * 100).round().astype(int).astype(str)
+    emoji = pd.Series(np.select([used > 1, used >= 0.75], ["⛔", "⚠️"], "✅"), index=used.index)
+    amounts = "&#36;" + spent.map("{:,.2f}".format) + " of &#36;" + budget.map("{:,.2f}".format) + " spent "
+    status = ("(" + left + "% left)").where(used <= 1, "(<span style='color:red;'>" + over + "% OVER</span>)")
+    return pd.DataFrame({"label": emoji + " " + categories.astype(str) + ": " + amounts + status, "progress": progress})
@@ -0,0 +1,83 @@
+import logging
+import queue
+import time
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# type is "insert", "update" or "delete" for a row event, or "changed" when the feed
+# only knows that something in the table changed. record is the row after the
+# change, old_record the row before it (at least its primary key, for deletes).
+ChangeEvent = namedtuple("ChangeEvent", "table type record old_record", defaults=(None, None))
+
+# --- Change feeds ---
+# a feed is anything with poll(timeout): it blocks for up to timeout seconds and
+# returns the events that arrived, possibly none. supabase_db runs one feed per
+# process on a background thread.
+class QueueFeed:
+    # a local stand-in for a realtime subscription: writers publish row events and
+    # the feed thread receives them in order. used in tests and benchmarks.
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def publish(self, table, type, record=None, old_record=None):
+        self.queue.put(ChangeEvent(table, type, record, old_record))
+
+    def poll(self, timeout):
+        try:
+            events = [self.queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                return events
+
+class PollingFeed:
+    # for backends without realtime: every interval, one small request per table reads
+    # its row count and highest key, plus the latest updated_at where the table has
+    # that column. a table whose signature moved gets a "changed" event. edits to a
+    # table without updated_at only show up once its count or highest key moves.
+    def __init__(self, get_client, keys, interval=5.0, updated_at="updated_at"):
+        self.get_client = get_client
+        self.keys = keys
+        self.interval = interval
+        self.updated_at = updated_at
+        self.signatures = {}
+        self.has_updated_at = {}
+        self.next_poll = 0.0
+
+    def signature(self, table):
+        key = self.keys.get(table, "id")
+        client = self.get_client()
+        response = client.table(table).select(key, count="exact").order(key, desc=True).limit(1).execute()
+        signature = [response.count, response.data[0][key] if response.data else None]
+        if table not in self.has_updated_at:
+            sample = client.table(table).select("*").limit(1).execute().data
+            self.has_updated_at[table] = bool(sample) and self.updated_at in sample[0]
+        if self.has_updated_at[table]:
+            rows = client.table(table).select(self.updated_at).order(self.updated_at, desc=True).limit(1).execute().data
+            signature.append(rows[0][self.updated_at] if rows else None)
+        return tuple(signature)
+
+    def poll(self, timeout):
+        wait = self.next_poll - time.monotonic()
+        if wait > 0:
+            time.sleep(min(wait, timeout))
+            if wait > timeout:
+                return []
+        self.next_poll = time.monotonic() + self.interval
+        events = []
+        for table in self.keys:
+            try:
+                signature = self.signature(table)
+            except Exception as e:
+                logger.debug("change feed poll of %s failed: %r", table, e)
+                continue
+            previous = self.signatures.get(table)
+            self.signatures[table] = signature
+            # the first poll only records where each table starts
+            if previous is not None and signature != previous:
+                events.append(ChangeEvent(table, "changed"))
+        return events
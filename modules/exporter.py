@@ -0,0 +1,109 @@
+import argparse
+import calendar
+import json
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from modules.supabase_db import iter_transactions, get_rollup
+
+FORMATS = ["csv", "parquet"]
+MIME_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+TRANSACTION_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("date", pa.date32()),
+    ("category", pa.string()),
+    ("description", pa.string()),
+    ("amount", pa.float64()),
+    ("type", pa.string()),
+])
+ROLLUP_SCHEMA = pa.schema([
+    ("month", pa.string()),
+    ("category", pa.string()),
+    ("type", pa.string()),
+    ("amount", pa.float64()),
+    ("count", pa.int64()),
+])
+
+# --- Month ranges ---
+def month_bounds(start_month=None, end_month=None):
+    # "yyyy-mm" months to the first and last day they cover
+    start = f"{start_month}-01" if start_month else None
+    if not end_month:
+        return start, None
+    year, month = map(int, end_month.split("-"))
+    return start, f"{end_month}-{calendar.monthrange(year, month)[1]:02d}"
+
+# --- Writing ---
+# chunks are written as they arrive: csv appends rows under one header and parquet
+# adds a row group per chunk, so only one chunk is in memory at a time.
+def _typed(chunk, schema):
+    chunk = chunk.reindex(columns=schema.names)
+    if "date" in chunk.columns:
+        chunk["date"] = pd.to_datetime(chunk["date"])
+    return chunk
+
+def write_chunks(chunks, path, fmt, schema):
+    rows = 0
+    if fmt == "csv":
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            pd.DataFrame(columns=schema.names).to_csv(f, index=False)
+            for chunk in chunks:
+                chunk = _typed(chunk, schema)
+                chunk.to_csv(f, header=False, index=False, date_format="%Y-%m-%d")
+                rows += len(chunk)
+        return rows
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pandas(_typed(chunk, schema), schema=schema, preserve_index=False))
+            rows += len(chunk)
+    return rows
+
+# --- Exports ---
+def export_transactions(path, fmt="csv", start=None, end=None, min_amount=None, max_amount=None,
+                        categories=None, search=None, page_size=None):
+    chunks = iter_transactions(start, end, min_amount, max_amount, categories, search, page_size)
+    return {"rows": write_chunks(chunks, path, fmt, TRANSACTION_SCHEMA)}
+
+def export_rollup(path, fmt="csv", start_month=None, end_month=None):
+    # month x category x type totals; small enough to write as one chunk
+    table = get_rollup().table.reset_index()
+    if start_month:
+        table = table[table["month"] >= start_month]
+    if end_month:
+        table = table[table["month"] <= end_month]
+    table = table.assign(amount=table["cents"] / 100).sort_values(["month", "category", "type"])
+    table["category"] = table["category"].astype(str)
+    return {"rows": write_chunks([table], path, fmt, ROLLUP_SCHEMA)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="export transactions or monthly totals to csv or parquet")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--rollup", action="store_true", help="export month x category totals instead of rows")
+    parser.add_argument("--from-month", help="first month to export, yyyy-mm")
+    parser.add_argument("--to-month", help="last month to export, yyyy-mm")
+    parser.add_argument("--start", help="first date to export, yyyy-mm-dd (overrides --from-month)")
+    parser.add_argument("--end", help="last date to export, yyyy-mm-dd (overrides --to-month)")
+    parser.add_argument("--min-amount", type=float)
+    parser.add_argument("--max-amount", type=float)
+    parser.add_argument("--category", action="append", help="only this category; repeat for several")
+    parser.add_argument("--search", help="only transactions matching this text")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or os.path.splitext(args.path)[1].lstrip(".").lower()
+    if fmt not in FORMATS:
+        parser.error(f"can't tell the format from {args.path!r}, pass --format")
+    if args.rollup:
+        result = export_rollup(args.path, fmt, args.from_month, args.to_month)
+    else:
+        start, end = month_bounds(args.from_month, args.to_month)
+        result = export_transactions(
+            args.path, fmt, args.start or start, args.end or end, args.min_amount, args.max_amount,
+            tuple(args.category) if args.category else None, args.search,
+        )
+    print(json.dumps(result))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import argparse
+import csv
+import datetime
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+from collections import Counter
+import pandas as pd
+from modules.supabase_db import sync_transactions, insert_transactions
+
+CHECKPOINT_DIR = os.environ.get("BUDGET_TRACKER_CHECKPOINT_DIR", ".import_checkpoints")
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_CATEGORY = "miscellaneous"
+
+DATE_COLUMNS = ["date", "transaction date", "posted date", "posting date"]
+DESCRIPTION_COLUMNS = ["description", "memo", "payee", "name", "details"]
+
+# --- Parsing ---
+# both parsers read the statement line by line and yield rows already normalized
+# to the transactions schema, so a statement is never held in memory as a whole.
+def _parse_date(value):
+    value = value.strip()
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        return pd.to_datetime(value).date()
+
+def _parse_amount(value):
+    value = value.strip().replace("$", "").replace(",", "")
+    if value.startswith("(") and value.endswith(")"):
+        value = "-" + value[1:-1]
+    return float(value) if value else 0.0
+
+def _row(date, amount, description, category):
+    return {
+        "date": str(date),
+        "category": category,
+        "description": description.strip(),
+        "amount": round(abs(amount), 2),
+        "type": "expense" if amount < 0 else "income",
+    }
+
+def _pick(columns, candidates):
+    return next((columns[name] for name in candidates if name in columns), None)
+
+def _value(record, column):
+    return (record.get(column) or "") if column else ""
+
+def iter_csv_rows(lines, category=DEFAULT_CATEGORY):
+    reader = csv.DictReader(lines)
+    columns = {name.strip().lower(): name for name in reader.fieldnames or []}
+    date_col = _pick(columns, DATE_COLUMNS)
+    desc_col = _pick(columns, DESCRIPTION_COLUMNS)
+    if date_col is None:
+        raise ValueError("statement has no date column")
+
+    for record in reader:
+        if "amount" in columns:
+            amount = _parse_amount(record[columns["amount"]])
+        else:
+            # bank exports often split the amount into debit / credit columns
+            debit = _parse_amount(_value(record, columns.get("debit")))
+            credit = _parse_amount(_value(record, columns.get("credit")))
+            amount = credit - debit
+        row_category = _value(record, columns.get("category")).strip() or category
+        yield _row(_parse_date(record[date_col]), amount, _value(record, desc_col), row_category)
+
+OFX_TAG = re.compile(r"<(/?\w+)>([^<\r\n]*)")
+
+def iter_ofx_rows(lines, category=DEFAULT_CATEGORY):
+    # handles both the sgml (unclosed leaf tags) and xml flavours of ofx/qfx
+    fields = None
+    for line in lines:
+        for tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                fields = {}
+            elif tag == "/STMTTRN" and fields is not None:
+                date = datetime.datetime.strptime(fields["DTPOSTED"][:8], "%Y%m%d").date()
+                description = fields.get("NAME") or fields.get("MEMO", "")
+                yield _row(date, _parse_amount(fields.get("TRNAMT", "0")), description, category)
+                fields = None
+            elif fields is not None and value.strip():
+                fields[tag] = value.strip()
+
+def iter_statement_rows(lines, fmt, category=DEFAULT_CATEGORY):
+    if fmt == "csv":
+        return iter_csv_rows(lines, category)
+    if fmt in ("ofx", "qfx"):
+        return iter_ofx_rows(lines, category)
+    raise ValueError(f"unsupported statement format: {fmt}")
+
+# --- Dedupe ---
+# a row's key is the hash of its normalized fields plus how many identical rows came
+# before it, so two genuine $5 coffees on the same day are both kept while
+# re-importing the same statement inserts nothing.
+def _fields(row):
+    return (str(row["date"])[:10], f"{float(row['amount']):.2f}", row["type"], str(row["description"]).strip().lower())
+
+def _key(fields, occurrence):
+    return hashlib.sha256("|".join(fields + (str(occurrence),)).encode()).hexdigest()
+
+def existing_keys():
+    # checked against the server, not a snapshot that may predate the last import
+    df = sync_transactions()
+    keys = set()
+    seen = Counter()
+    if df.empty:
+        return keys
+    # the frame holds integer cents and categoricals; key on the stored form
+    rows = pd.DataFrame({
+        "date": df["date"],
+        "amount": df["amount_cents"] / 100,
+        "type": df["type"].astype(object),
+        "description": df["description"].astype(object),
+    }).fillna("")
+    for row in rows.itertuples(index=False):
+        fields = _fields(row._asdict())
+        seen[fields] += 1
+        keys.add(_key(fields, seen[fields]))
+    return keys
+
+# --- Checkpoints ---
+def _source_id(stream):
+    # first MB plus total size identifies a statement without reading all of it
+    start = stream.tell()
+    head = stream.read(1024 * 1024)
+    stream.seek(0, io.SEEK_END)
+    size = stream.tell()
+    stream.seek(start)
+    return hashlib.sha256(head + str(size).encode()).hexdigest()[:16]
+
+def _checkpoint_path(source_id):
+    return os.path.join(CHECKPOINT_DIR, f"{source_id}.json")
+
+def _load_checkpoint(source_id):
+    try:
+        with open(_checkpoint_path(source_id)) as f:
+            return json.load(f)["rows_done"]
+    except (OSError, ValueError, KeyError):
+        return 0
+
+def _save_checkpoint(source_id, rows_done):
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    with open(_checkpoint_path(source_id), "w") as f:
+        json.dump({"rows_done": rows_done}, f)
+
+def _clear_checkpoint(source_id):
+    try:
+        os.remove(_checkpoint_path(source_id))
+    except OSError:
+        pass
+
+# --- Import ---
+def import_statement(stream, fmt, category=DEFAULT_CATEGORY, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    # stream is a binary file object; progress(rows_read, inserted, skipped) is called per batch
+    source_id = _source_id(stream)
+    resume_from = _load_checkpoint(source_id)
+    keys = existing_keys()
+    seen = Counter()
+    batch = []
+    rows_read = inserted = skipped = 0
+
+    def flush():
+        nonlocal inserted
+        if batch:
+            insert_transactions(batch)
+            inserted += len(batch)
+            batch.clear()
+        _save_checkpoint(source_id, rows_read)
+        if progress:
+            progress(rows_read, inserted, skipped)
+
+    lines = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        for row in iter_statement_rows(lines, fmt, category):
+            rows_read += 1
+            fields = _fields(row)
+            seen[fields] += 1
+            if rows_read <= resume_from:
+                continue
+            key = _key(fields, seen[fields])
+            if key in keys:
+                skipped += 1
+                continue
+            keys.add(key)
+            batch.append(row)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    finally:
+        lines.detach()
+    _clear_checkpoint(source_id)
+    return {"rows": rows_read, "inserted": inserted, "skipped": skipped, "resumed_from": resume_from}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="import a bank statement into the transactions table")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "ofx", "qfx"])
+    parser.add_argument("--category", default=DEFAULT_CATEGORY)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    fmt = args.format or os.path.splitext(args.path)[1].lstrip(".").lower()
+
+    def report(rows_read, inserted, skipped):
+        print(f"\r{rows_read} rows read, {inserted} inserted, {skipped} duplicates skipped", end="", file=sys.stderr)
+
+    with open(args.path, "rb") as stream:
+        result = import_statement(stream, fmt, args.category, args.batch_size, progress=report)
+    print(file=sys.stderr)
+    print(json.dumps(result))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import contextvars
+import cProfile
+import datetime
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+import pandas as pd
+
+PERF_LOG = os.environ.get("BUDGET_TRACKER_PERF_LOG", "")  # json-lines file; empty disables logging
+PROFILE_ROWS = 25
+
+_current_run = contextvars.ContextVar("perf_run", default=None)
+_current_call = contextvars.ContextVar("perf_call", default=None)
+_log_lock = threading.Lock()
+
+# --- Runs ---
+# one run per rerun (or fragment rerun) that something asked to record. supabase_db
+# calls, render sections and http responses attach themselves to the current run,
+# so nothing is measured, and nothing costs anything, when no run is active.
+class Run:
+    def __init__(self, name, profile=False, **meta):
+        self.name = name
+        self.meta = meta
+        self.calls = []
+        self.sections = []
+        self.http = {"requests": 0, "bytes": 0, "seconds": 0.0}
+        self.lock = threading.Lock()
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self.started = time.perf_counter()
+        self.seconds = None
+        self.profiler = None
+        self.profile = []
+        if profile:
+            self.profiler = cProfile.Profile()
+            try:
+                self.profiler.enable()
+            except ValueError:
+                self.profiler = None  # another profiler is already running on this thread
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.started
+        if self.profiler is not None:
+            self.profiler.disable()
+            stats = pstats.Stats(self.profiler).sort_stats("cumulative")
+            for (file, line, function), (_, calls, total, cumulative, _) in list(stats.stats.items()):
+                self.profile.append({"function": f"{function} ({os.path.basename(file)}:{line})", "calls": calls,
+                                     "total": round(total, 6), "cumulative": round(cumulative, 6)})
+            self.profile = sorted(self.profile, key=lambda row: -row["cumulative"])[:PROFILE_ROWS]
+            self.profiler = None
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "at": self.started_at.isoformat(),
+                "run": self.name,
+                **self.meta,
+                "seconds": round(self.seconds or 0.0, 6),
+                "http": dict(self.http),
+                "calls": [dict(call) for call in self.calls],
+                "sections": list(self.sections),
+                "profile": list(self.profile),
+            }
+
+def current_run():
+    return _current_run.get()
+
+def start_run(name, profile=False, **meta):
+    run = Run(name, profile, **meta)
+    _current_run.set(run)
+    _current_call.set(None)
+    return run
+
+def finish_run(run):
+    if _current_run.get() is run:
+        _current_run.set(None)
+    run.finish()
+    record = run.to_dict()
+    if PERF_LOG:
+        with _log_lock:
+            os.makedirs(os.path.dirname(PERF_LOG) or ".", exist_ok=True)
+            with open(PERF_LOG, "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+    return record
+
+@contextmanager
+def recording(name, enabled=True, **meta):
+    # a section of the current run, or a run of its own when nothing is recording yet
+    # (a fragment rerunning by itself); yields the finished record in the latter case
+    if _current_run.get() is not None:
+        with section(name):
+            yield None
+        return
+    if not enabled:
+        yield None
+        return
+    run = start_run(name, **meta)
+    result = {}
+    try:
+        yield result
+    finally:
+        result.update(finish_run(run))
+
+@contextmanager
+def section(name):
+    run = _current_run.get()
+    if run is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        with run.lock:
+            run.sections.append({"name": name, "seconds": round(time.perf_counter() - started, 6)})
+
+def bind(fn):
+    # worker threads don't inherit context vars; run fn in a copy of the caller's
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+# --- Calls ---
+def _rows(value):
+    if isinstance(value, (pd.DataFrame, list, dict)):
+        return len(value)
+    return None
+
+def traced(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        run = _current_run.get()
+        if run is None:
+            return fn(*args, **kwargs)
+        parent = _current_call.get()
+        call = {"call": fn.__name__, "depth": parent["depth"] + 1 if parent else 0,
+                "seconds": None, "rows": None, "http_requests": 0, "payload_bytes": 0, "http_seconds": 0.0}
+        with run.lock:
+            run.calls.append(call)
+        token = _current_call.set(call)
+        started = time.perf_counter()
+        try:
+            value = fn(*args, **kwargs)
+            call["rows"] = _rows(value)
+            return value
+        except Exception as e:
+            call["error"] = type(e).__name__
+            raise
+        finally:
+            call["seconds"] = round(time.perf_counter() - started, 6)
+            _current_call.reset(token)
+    return wrapper
+
+def note(**fields):
+    # adds fields (e.g. cache="hit") to the innermost traced call
+    call = _current_call.get()
+    if call is not None:
+        call.update(fields)
+
+def on_response(response):
+    # httpx response hook: counts each supabase response against the current run and call
+    run = _current_run.get()
+    if run is None:
+        return
+    response.read()
+    size = len(response.content)
+    seconds = response.elapsed.total_seconds()
+    call = _current_call.get()
+    with run.lock:
+        run.http["requests"] += 1
+        run.http["bytes"] += size
+        run.http["seconds"] += seconds
+        if call is not None:
+            call["http_requests"] += 1
+            call["payload_bytes"] += size
+            call["http_seconds"] += seconds
@@ -0,0 +1,102 @@
+PRIMARY_KEYS = {"transactions": "id", "budgets": "id", "tags": "name"}
+
+# --- Query builder ---
+# the subset of supabase-py's table(...) builder that supabase_db calls. it only
+# records what was asked for; a backend subclasses it and runs the recorded query in
+# _select, _insert, _upsert, _update and _delete. the sqlite backend and the
+# benchmarks' in-memory fake are both built on it.
+class Response:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+class QueryBuilder:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.key = PRIMARY_KEYS.get(table, "id")
+        self.op = "select"
+        self.columns = "*"
+        self.count = None
+        self.filters = []
+        self.orders = []
+        self.row_limit = None
+        self.offset = 0
+        self.payload = None
+        self.on_conflict = None
+
+    # --- select ---
+    def select(self, *columns, count=None):
+        self.columns = ",".join(columns) or "*"
+        self.count = count
+        return self
+
+    def _filter(self, op, column, value):
+        self.filters.append((op, column, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter("eq", column, value)
+
+    def neq(self, column, value):
+        return self._filter("neq", column, value)
+
+    def gt(self, column, value):
+        return self._filter("gt", column, value)
+
+    def gte(self, column, value):
+        return self._filter("gte", column, value)
+
+    def lt(self, column, value):
+        return self._filter("lt", column, value)
+
+    def lte(self, column, value):
+        return self._filter("lte", column, value)
+
+    def in_(self, column, values):
+        return self._filter("in", column, list(values))
+
+    def ilike(self, column, pattern):
+        return self._filter("ilike", column, pattern)
+
+    def order(self, column, desc=False):
+        # accepts postgrest's "col.desc,other" form as well as a single column
+        for part in column.split(","):
+            name, *modifiers = part.split(".")
+            self.orders.append((name, desc or "desc" in modifiers))
+        return self
+
+    def limit(self, size):
+        self.row_limit = size
+        return self
+
+    def range(self, start, end):
+        # exclusive end, like postgrest-py's range()
+        self.offset = start
+        self.row_limit = end - start
+        return self
+
+    # --- writes ---
+    def insert(self, rows, **kwargs):
+        self.op = "insert"
+        self.payload = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict=None, **kwargs):
+        self.op = "upsert"
+        self.payload = rows if isinstance(rows, list) else [rows]
+        self.on_conflict = on_conflict or self.key
+        return self
+
+    def update(self, row):
+        self.op = "update"
+        self.payload = row
+        return self
+
+    def delete(self):
+        self.op = "delete"
+        return self
+
+    # --- execution ---
+    def execute(self):
+        return getattr(self, f"_{self.op}")()
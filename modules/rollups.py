@@ -0,0 +1,83 @@
+import pandas as pd
+
+KEYS = ["month", "category", "type"]
+
+# --- Rollup ---
+# month x category x type sums and counts of transaction amounts. the sync feeds it
+# the rows it removes and adds, so keeping it current costs as much as the delta
+# and reading it never touches raw transactions. sums are kept in integer cents so
+# adding and removing deltas never drifts; months are "YYYY-MM" labels.
+def _month_label(key):
+    return f"{key // 100:04d}-{key % 100:02d}"
+
+def _group(df):
+    if df is None or df.empty:
+        return pd.DataFrame({"cents": pd.Series(dtype="int64"), "count": pd.Series(dtype="int64")},
+                            index=pd.MultiIndex.from_tuples([], names=KEYS))
+    # grouped on the compact columns: integer month key, categoricals, integer cents
+    type_ = df["type"].map(str.lower) if df["type"].dtype == "category" else df["type"].str.lower()
+    keys = [df["month_key"].rename("month"), df["category"], type_.rename("type")]
+    table = df["amount_cents"].groupby(keys, observed=True).agg(cents="sum", count="size")
+    table.index = table.index.set_levels(
+        [table.index.levels[0].map(_month_label), table.index.levels[1].astype(object), table.index.levels[2].astype(object)]
+    )
+    return table
+
+class MonthlyRollup:
+    def __init__(self, table=None):
+        self.table = table if table is not None else _group(None)
+
+    @classmethod
+    def from_rows(cls, rows):
+        # rows already grouped elsewhere (e.g. by the database): month, category, type, cents, count
+        if not rows:
+            return cls()
+        table = pd.DataFrame(rows).set_index(KEYS)[["cents", "count"]]
+        return cls(table.astype("int64").sort_index())
+
+    @property
+    def empty(self):
+        return self.table.empty
+
+    def copy(self):
+        return MonthlyRollup(self.table.copy())
+
+    def rebuild(self, df):
+        self.table = _group(df)
+
+    def apply(self, removed, added):
+        table = self.table.add(_group(added), fill_value=0).sub(_group(removed), fill_value=0)
+        table = table[table["count"] > 0]
+        self.table = table.astype("int64")
+
+    def months(self):
+        return self.table.index.get_level_values("month").unique().tolist()
+
+    def totals(self, month):
+        if month not in self.table.index.get_level_values("month"):
+            return {}
+        cents = self.table.xs(month, level="month").groupby(level="type")["cents"].sum()
+        return (cents / 100).to_dict()
+
+    def by_category(self, month, type_="expense"):
+        try:
+            rows = self.table.xs((month, type_), level=("month", "type"))
+        except KeyError:
+            return pd.DataFrame(columns=["category", "amount"])
+        return (
+            (rows["cents"] / 100).rename("amount")
+            .reset_index()
+            .sort_values(by="amount", ascending=False, ignore_index=True)
+        )
+
+def budget_vs_actual(budget_df, rollup, month):
+    budgeted = (
+        budget_df.rename(columns={"amount": "budgeted_amount"})
+                 .groupby('category', as_index=False)['budgeted_amount']
+                 .sum()
+    )
+    actuals = rollup.by_category(month, "expense").rename(columns={'amount': 'actual_spent'})
+    merged = pd.merge(budgeted, actuals, on='category', how='left')
+    merged['actual_spent'] = merged['actual_spent'].fillna(0)
+    merged['difference'] = merged['budgeted_amount'] - merged['actual_spent']
+    return merged
@@ -0,0 +1,134 @@
+import bisect
+import math
+import re
+import threading
+import numpy as np
+import pandas as pd
+
+TOKEN = re.compile(r"\w+")
+FIELD_WEIGHTS = {"description": 1.0, "category": 0.6}
+PREFIX_WEIGHT = 0.6     # "cost" finding "costco" ranks below an exact word match
+MIN_PREFIX = 2
+MAX_PREFIX_TOKENS = 256
+
+# --- Search index ---
+# an inverted index from each word of a transaction's description and category to
+# the sorted ids that contain it. like the rollup, the sync feeds it the rows it
+# removes and adds, so it stays current at the cost of the delta. every query word
+# must match, either exactly or as a word prefix; matches are ranked by the words'
+# rarity, field and exactness, newest first on ties.
+def tokenize(text):
+    return TOKEN.findall(str(text).lower())
+
+def _postings(df):
+    # (field, word) -> sorted ids for every word of every row in df. descriptions
+    # repeat a lot, so each distinct value is tokenized once and its rows looked up
+    # by factorized code.
+    postings = {}
+    if df is None or df.empty or "id" not in df.columns:
+        return postings
+    ids = df["id"].to_numpy(dtype="int64")
+    for field in FIELD_WEIGHTS:
+        if field not in df.columns:
+            continue
+        codes, values = pd.factorize(df[field].astype(object), use_na_sentinel=True)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(values) + 1))
+        rows = [ids[order[bounds[code]:bounds[code + 1]]] for code in range(len(values))]
+        by_word = {}
+        for code, value in enumerate(values):
+            for word in set(tokenize(value)):
+                by_word.setdefault(word, []).append(rows[code])
+        for word, parts in by_word.items():
+            postings[(field, word)] = np.unique(np.concatenate(parts))
+    return postings
+
+def _merge(existing, ids):
+    keep = existing[~np.isin(existing, ids, assume_unique=True)] if len(existing) else existing
+    return np.insert(keep, np.searchsorted(keep, ids), ids)
+
+class SearchIndex:
+    def __init__(self):
+        self.postings = {}
+        self.vocabulary = []
+        self.rows = 0
+        self.built = False
+        self.lock = threading.Lock()
+
+    def reset(self):
+        with self.lock:
+            self.postings = {}
+            self.vocabulary = []
+            self.rows = 0
+            self.built = False
+
+    def rebuild(self, df):
+        postings = _postings(df)
+        with self.lock:
+            self.postings = postings
+            self.vocabulary = sorted({word for _, word in postings})
+            self.rows = len(df) if df is not None else 0
+            self.built = True
+
+    def apply(self, removed, added):
+        change = (len(added) if added is not None else 0) - (len(removed) if removed is not None else 0)
+        removed, added = _postings(removed), _postings(added)
+        with self.lock:
+            words = len(self.postings)
+            for key, ids in removed.items():
+                existing = self.postings.get(key)
+                if existing is None:
+                    continue
+                remaining = existing[~np.isin(existing, ids, assume_unique=True)]
+                if len(remaining):
+                    self.postings[key] = remaining
+                else:
+                    del self.postings[key]
+            for key, ids in added.items():
+                existing = self.postings.get(key)
+                self.postings[key] = ids if existing is None else _merge(existing, ids)
+            if len(self.postings) != words or any(key not in self.postings for key in removed):
+                self.vocabulary = sorted({word for _, word in self.postings})
+            self.rows = max(self.rows + change, 0)
+
+    def _words(self, term):
+        if len(term) < MIN_PREFIX:
+            return [term]
+        start = bisect.bisect_left(self.vocabulary, term)
+        end = bisect.bisect_left(self.vocabulary, term + "￿")
+        return self.vocabulary[start:min(end, start + MAX_PREFIX_TOKENS)]
+
+    def _match(self, term):
+        # ids containing term, each with its best weight across words and fields
+        ids, weights = [], []
+        for word in self._words(term):
+            for field, field_weight in FIELD_WEIGHTS.items():
+                matches = self.postings.get((field, word))
+                if matches is None:
+                    continue
+                idf = math.log(1 + max(self.rows, len(matches)) / len(matches))
+                weight = field_weight * idf * (1.0 if word == term else PREFIX_WEIGHT)
+                ids.append(matches)
+                weights.append(np.full(len(matches), weight))
+        if not ids:
+            return np.empty(0, dtype="int64"), np.empty(0)
+        ids, weights = np.concatenate(ids), np.concatenate(weights)
+        order = np.lexsort((-weights, ids))
+        ids, weights = ids[order], weights[order]
+        first = np.r_[True, ids[1:] != ids[:-1]]
+        return ids[first], weights[first]
+
+    def search(self, text):
+        # ranked ids, best first; None when text has no words to search for
+        terms = tokenize(text)
+        if not terms:
+            return None
+        with self.lock:
+            ids, scores = self._match(terms[0])
+            for term in terms[1:]:
+                if not len(ids):
+                    break
+                term_ids, term_scores = self._match(term)
+                ids, left, right = np.intersect1d(ids, term_ids, assume_unique=True, return_indices=True)
+                scores = scores[left] + term_scores[right]
+        return ids[np.lexsort((-ids, -scores))]
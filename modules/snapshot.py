@@ -0,0 +1,95 @@
+import atexit
+import logging
+import os
+import threading
+import time
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.environ.get("BUDGET_TRACKER_SNAPSHOT_DIR", ".snapshot")
+SNAPSHOT_ENABLED = os.environ.get("BUDGET_TRACKER_SNAPSHOT", "1") != "0"
+SNAPSHOT_INTERVAL_SECONDS = float(os.environ.get("BUDGET_TRACKER_SNAPSHOT_INTERVAL", "30"))
+
+_write_lock = threading.Lock()
+
+# --- Snapshot ---
+# one parquet file per table. reads are memory-mapped and writes go to a temp file
+# that is renamed into place, so a reader never sees a half-written snapshot.
+def _path(table):
+    return os.path.join(SNAPSHOT_DIR, f"{table}.parquet")
+
+def load_snapshot(table):
+    if not SNAPSHOT_ENABLED or not os.path.exists(_path(table)):
+        return None
+    try:
+        return pq.read_table(_path(table), memory_map=True).to_pandas()
+    except (OSError, pa.ArrowException):
+        return None
+
+def save_snapshot(table, df):
+    if not SNAPSHOT_ENABLED or df is None:
+        return
+    with _write_lock:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        tmp_path = _path(table) + ".tmp"
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+        os.replace(tmp_path, _path(table))
+
+# --- Background writer ---
+# syncs hand over every new frame, but only the latest one per table is kept and a
+# single writer thread saves each table at most every SNAPSHOT_INTERVAL_SECONDS, so
+# a burst of small writes costs one rewrite and holds one frame per table.
+_pending = {}
+_last_saved = {}
+_pending_lock = threading.Condition()
+_writer = None
+
+def save_snapshot_async(table, df):
+    # frames are replaced, never mutated in place, so writing from a thread is safe
+    global _writer
+    if not SNAPSHOT_ENABLED or df is None:
+        return
+    with _pending_lock:
+        _pending[table] = df
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_write_pending, name="snapshot-writer", daemon=True)
+            _writer.start()
+        _pending_lock.notify()
+
+def _due(table):
+    return _last_saved.get(table, float("-inf")) + SNAPSHOT_INTERVAL_SECONDS
+
+def _next_pending():
+    with _pending_lock:
+        while True:
+            if _pending:
+                table = min(_pending, key=_due)
+                wait = _due(table) - time.monotonic()
+                if wait <= 0:
+                    return table, _pending.pop(table)
+                _pending_lock.wait(wait)
+            else:
+                _pending_lock.wait()
+
+def _save_logged(table, df):
+    try:
+        save_snapshot(table, df)
+    except (OSError, pa.ArrowException) as e:
+        logger.warning("couldn't save the %s snapshot: %r", table, e)
+    with _pending_lock:
+        _last_saved[table] = time.monotonic()
+
+def _write_pending():
+    while True:
+        _save_logged(*_next_pending())
+
+@atexit.register
+def flush_snapshots():
+    # saves whatever is still waiting for its interval
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+    for table, df in pending.items():
+        _save_logged(table, df)
@@ -0,0 +1,195 @@
+import itertools
+import sqlite3
+import threading
+from modules.query_builder import QueryBuilder, Response
+
+SCHEMA = """
+create table if not exists transactions (
+    id integer primary key autoincrement,
+    date text not null,
+    category text,
+    description text,
+    amount real not null,
+    type text not null
+);
+create index if not exists transactions_date on transactions (date);
+create index if not exists transactions_month on transactions (substr(date, 1, 7), category, type, amount);
+create index if not exists transactions_category on transactions (category);
+
+create table if not exists budgets (
+    id integer primary key autoincrement,
+    month text not null,
+    category text not null,
+    amount real not null
+);
+create index if not exists budgets_month on budgets (month, category);
+
+create table if not exists tags (
+    name text primary key,
+    color text
+);
+"""
+
+_memory_ids = itertools.count(1)
+
+# --- SQLite backend ---
+# a drop-in for the supabase client: table() returns a query builder (see
+# query_builder.py) whose select / filter / order / write calls are compiled to sql
+# against a local database file. the month x category x type rollup and distinct month lists
+# run as native group-bys on indexes instead of pulling rows into pandas.
+class SQLiteClient:
+    def __init__(self, path):
+        # ":memory:" gets a private shared-cache database, so every thread sees the same data
+        if path == ":memory:":
+            self.path = f"file:budget_tracker_{next(_memory_ids)}?mode=memory&cache=shared"
+        else:
+            self.path = path if path.startswith("file:") else f"file:{path}"
+        self.local = threading.local()
+        self.columns = {}
+        self.keep_alive = self._connect()  # a shared-cache memory db lives as long as a connection does
+        self.keep_alive.executescript(SCHEMA)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, uri=True, timeout=30, isolation_level=None, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        if "mode=memory" not in self.path:
+            connection.execute("pragma journal_mode=wal")
+            connection.execute("pragma synchronous=normal")
+        return connection
+
+    def connection(self):
+        # sqlite connections are per thread; prefetch and page workers each get their own
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = self.local.connection = self._connect()
+        return connection
+
+    def table_columns(self, table):
+        if table not in self.columns:
+            rows = self.connection().execute(f"pragma table_info({_quote(table)})").fetchall()
+            if not rows:
+                raise ValueError(f"unknown table: {table}")
+            self.columns[table] = [row["name"] for row in rows]
+        return self.columns[table]
+
+    def table(self, name):
+        return _Query(self, name)
+
+    # --- native aggregations ---
+    def monthly_rollup(self):
+        return [dict(row) for row in self.connection().execute(
+            "select substr(date, 1, 7) as month, category, lower(type) as type, "
+            "sum(cast(round(amount * 100) as integer)) as cents, count(*) as count from transactions "
+            "where category is not null and type is not null "
+            "group by substr(date, 1, 7), category, lower(type)"
+        )]
+
+    def distinct(self, table, column):
+        self._check(table, column)
+        return [row[0] for row in self.connection().execute(
+            f"select distinct {_quote(column)} from {_quote(table)} "
+            f"where {_quote(column)} is not null order by 1"
+        )]
+
+    def _check(self, table, *columns):
+        known = self.table_columns(table)
+        for column in columns:
+            if column not in known:
+                raise ValueError(f"unknown column {column!r} on {table}")
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+def _value(value):
+    # numpy scalars, dates and timestamps go in the way they would as json
+    if value is None or isinstance(value, (str, int, float, bytes)):
+        return value
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+OPERATORS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+class _Query(QueryBuilder):
+    # --- execution ---
+    def _where(self):
+        clauses, params = [], []
+        for op, column, value in self.filters:
+            self.client._check(self.table, column)
+            if op == "in":
+                if not value:
+                    clauses.append("0")
+                    continue
+                clauses.append(f"{_quote(column)} in ({', '.join('?' * len(value))})")
+                params += [_value(item) for item in value]
+            elif op == "ilike":
+                clauses.append(f"{_quote(column)} like ?")  # like is case-insensitive in sqlite
+                params.append(value)
+            else:
+                clauses.append(f"{_quote(column)} {OPERATORS[op]} ?")
+                params.append(_value(value))
+        return (" where " + " and ".join(clauses) if clauses else ""), params
+
+    def _rows(self, sql, params=()):
+        return [dict(row) for row in self.client.connection().execute(sql, params)]
+
+    def _select(self):
+        where, params = self._where()
+        columns = "*"
+        if self.columns != "*":
+            names = self.columns.split(",")
+            self.client._check(self.table, *names)
+            columns = ", ".join(_quote(name) for name in names)
+        sql = f"select {columns} from {_quote(self.table)}{where}"
+        if self.orders:
+            self.client._check(self.table, *(name for name, _ in self.orders))
+            sql += " order by " + ", ".join(f"{_quote(name)}{' desc' if desc else ''}" for name, desc in self.orders)
+        if self.row_limit is not None or self.offset:
+            sql += f" limit {int(self.row_limit if self.row_limit is not None else -1)} offset {int(self.offset)}"
+        count = None
+        if self.count:
+            count = self.client.connection().execute(f"select count(*) from {_quote(self.table)}{where}", params).fetchone()[0]
+        return Response(self._rows(sql, params), count)
+
+    def _write(self, statements):
+        # one transaction per request, like a single postgrest call
+        connection = self.client.connection()
+        written = []
+        connection.execute("begin immediate")
+        try:
+            for sql, params in statements:
+                written += [dict(row) for row in connection.execute(sql, params)]
+        except BaseException:
+            connection.execute("rollback")
+            raise
+        connection.execute("commit")
+        return Response(written)
+
+    def _insert_sql(self, row, conflict=None):
+        columns = list(row)
+        self.client._check(self.table, *columns)
+        sql = (f"insert into {_quote(self.table)} ({', '.join(_quote(c) for c in columns)}) "
+               f"values ({', '.join('?' * len(columns))})")
+        updates = [column for column in columns if column != conflict]
+        if conflict is not None and conflict in row:
+            sql += f" on conflict ({_quote(conflict)}) do " + (
+                "update set " + ", ".join(f"{_quote(c)} = excluded.{_quote(c)}" for c in updates) if updates else "nothing"
+            )
+        return sql + " returning *", [_value(row[column]) for column in columns]
+
+    def _insert(self):
+        return self._write([self._insert_sql(row) for row in self.payload])
+
+    def _upsert(self):
+        return self._write([self._insert_sql(row, self.on_conflict) for row in self.payload])
+
+    def _update(self):
+        self.client._check(self.table, *self.payload)
+        where, params = self._where()
+        assignments = ", ".join(f"{_quote(column)} = ?" for column in self.payload)
+        values = [_value(value) for value in self.payload.values()]
+        return self._write([(f"update {_quote(self.table)} set {assignments}{where} returning *", values + params)])
+
+    def _delete(self):
+        where, params = self._where()
+        return self._write([(f"delete from {_quote(self.table)}{where} returning *", params)])
@@ -1,33 +1,700 @@
+import logging
 import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import wraps
+import httpx
+import numpy as np
 import pandas as pd
+from cachetools import LRUCache
+from postgrest.utils import SyncClient
+from tenacity import Retrying, retry_if_exception_type, stop_after_attempt, wait_exponential
 from supabase import create_client, Client
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from dotenv import load_dotenv
+from modules import perf
+from modules.change_feed import PollingFeed
+from modules.query_builder import PRIMARY_KEYS
+from modules.rollups import MonthlyRollup
+from modules.search import SearchIndex
+from modules.snapshot import load_snapshot, save_snapshot_async
+from modules.sqlite_backend import SQLiteClient
+from modules.write_queue import PendingWrite, WriteQueue
 
 load_dotenv()
+logger = logging.getLogger(__name__)
+
+# copy-on-write lets every session share the cached frames through cheap shallow
+# copies; a session that modifies its copy gets its own buffers at that point
+pd.set_option("mode.copy_on_write", True)
 
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+BACKEND = os.environ.get("BUDGET_TRACKER_BACKEND", "supabase")  # supabase or sqlite
+SQLITE_PATH = os.environ.get("BUDGET_TRACKER_SQLITE_PATH", "budget_tracker.db")
+
+# --- Client ---
+# one client per process, built on first use, so importing this module never
+# touches the network or needs the env vars. every session shares its keep-alive
+# connection pool. transient failures are retried with exponential backoff in the
+# transport: reads, updates, deletes and upserts on any transport error or 502-504,
+# plain inserts only when the request never reached the server.
+#
+# any object whose table() speaks the same builder calls can stand in for the
+# client (see set_client). BUDGET_TRACKER_BACKEND=sqlite swaps in a local sqlite
+# database, which also runs the rollup and month lists as native queries.
+HTTP_TIMEOUT_SECONDS = float(os.environ.get("BUDGET_TRACKER_HTTP_TIMEOUT", "10"))
+HTTP_POOL_SIZE = int(os.environ.get("BUDGET_TRACKER_HTTP_POOL", "20"))
+HTTP_RETRIES = int(os.environ.get("BUDGET_TRACKER_HTTP_RETRIES", "4"))
+RETRY_STATUSES = {502, 503, 504}
+
+class _RetryableStatus(Exception):
+    def __init__(self, response):
+        self.response = response
+
+class _RetryingTransport(httpx.HTTPTransport):
+    def handle_request(self, request):
+        idempotent = request.method != "POST" or "resolution=" in request.headers.get("prefer", "")
+        errors = (httpx.TransportError, _RetryableStatus) if idempotent else (httpx.ConnectError, httpx.ConnectTimeout)
+
+        def send():
+            response = super(_RetryingTransport, self).handle_request(request)
+            if idempotent and response.status_code in RETRY_STATUSES:
+                response.read()
+                raise _RetryableStatus(response)
+            return response
+
+        retrying = Retrying(
+            retry=retry_if_exception_type(errors),
+            stop=stop_after_attempt(HTTP_RETRIES),
+            wait=wait_exponential(multiplier=0.5, max=8),
+            reraise=True,
+        )
+        try:
+            return retrying(send)
+        except _RetryableStatus as e:
+            return e.response
+
+_client = None
+_client_lock = threading.Lock()
+
+def _create_client():
+    if BACKEND == "sqlite":
+        return SQLiteClient(SQLITE_PATH)
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        raise RuntimeError("SUPABASE_URL and SUPABASE_KEY must be set")
+    client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    # swap postgrest's default session for one with our pool, timeout and retries
+    session = client.postgrest.session
+    client.postgrest.session = SyncClient(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=HTTP_TIMEOUT_SECONDS,
+        event_hooks={"response": [perf.on_response]},
+        transport=_RetryingTransport(
+            limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE),
+        ),
+    )
+    session.close()
+    return client
+
+def get_client() -> Client:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _create_client()
+    return _client
+
+def set_client(client):
+    # swaps the backend for every caller, e.g. a fake client in benchmarks
+    global _client
+    with _client_lock:
+        _client = client
+    invalidate()
+
+def _native(name):
+    # an aggregation the backend can run itself, or None to do it in pandas
+    return getattr(get_client(), name, None)
+
+_warmed_up = threading.Event()
+
+def warm_up():
+    # builds the client and opens a pooled connection off the main thread, once per process
+    if _warmed_up.is_set() or os.environ.get("BUDGET_TRACKER_WARM_UP", "1") == "0":
+        return
+    _warmed_up.set()
+
+    def ping():
+        try:
+            get_client().table("tags").select("name").limit(1).execute()
+        except Exception as e:
+            logger.warning("supabase warm-up failed: %r", e)
+
+    threading.Thread(target=ping, name="supabase-warm-up", daemon=True).start()
+
+# --- Cache ---
+# module state is shared by every streamlit session in the process. each read is
+# keyed on the version of the tables it depends on, and every write helper bumps
+# those versions, so a rerun only goes to the network when the data changed.
+CACHE_MAX_BYTES = int(os.environ.get("BUDGET_TRACKER_CACHE_MB", "256")) * 1024 * 1024
+
+def _sizeof(value):
+    if isinstance(value, MonthlyRollup):
+        value = value.table  # getsizeof would only count the wrapper object
+    if isinstance(value, pd.DataFrame):
+        return max(int(value.memory_usage(deep=True).sum()), 1)
+    return sys.getsizeof(value)
+
+_cache = LRUCache(maxsize=CACHE_MAX_BYTES, getsizeof=_sizeof)
+_cache_lock = threading.RLock()
+_table_versions = {"transactions": 0, "budgets": 0, "tags": 0}
+_in_flight = {}
+
+def data_version(*tables):
+    with _cache_lock:
+        tables = tables or tuple(sorted(_table_versions))
+        return tuple(_table_versions.get(table, 0) for table in tables)
+
+def invalidate(*tables):
+    with _cache_lock:
+        for table in tables or tuple(_table_versions):
+            _table_versions[table] = _table_versions.get(table, 0) + 1
+
+def _share(value):
+    # callers are free to mutate what they get back, so never hand out the cached object.
+    # frames are shallow copies: with copy-on-write they share data until written to
+    if isinstance(value, pd.DataFrame):
+        return value.copy(deep=False)
+    if isinstance(value, (dict, list)):
+        return value.copy()
+    return value
+
+def _cached(*tables):
+    # no tables means the read depends on all of them (e.g. get_table_data)
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (fn.__name__, args, tuple(sorted(kwargs.items())), data_version(*tables))
+            with _cache_lock:
+                if key in _cache:
+                    perf.note(cache="hit")
+                    return _share(_cache[key])
+                # concurrent misses on the same key (prefetch threads, several
+                # sessions) wait for the first caller instead of fetching again
+                loading = _in_flight.get(key)
+                if loading is None:
+                    _in_flight[key] = threading.Event()
+            if loading is not None:
+                perf.note(cache="wait")
+                loading.wait()
+                return wrapper(*args, **kwargs)
+            perf.note(cache="miss")
+            try:
+                value = fn(*args, **kwargs)
+                with _cache_lock:
+                    try:
+                        _cache[key] = value
+                    except ValueError:
+                        pass  # larger than the whole cache, serve it uncached
+            finally:
+                with _cache_lock:
+                    _in_flight.pop(key).set()
+            return _share(value)
+        return perf.traced(wrapper)
+    return decorator
+
+def _written(*tables):
+    # after a local write: the change feed hasn't seen it, so the next transactions
+    # sync asks the server even if the feed had brought the frame up to date
+    if "transactions" in tables:
+        _transaction_sync.mark_dirty()
+    invalidate(*tables)
+
+def _invalidates(*tables):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _written(*tables)
+        return wrapper
+    return decorator
+
+# --- Prefetch ---
+# a page's reads are issued together on a shared pool instead of one after another.
+# anything that misses its timeout comes back as None so the page can render
+# without it; the fetch keeps running and lands in the cache for the next rerun.
+PREFETCH_TIMEOUT_SECONDS = float(os.environ.get("BUDGET_TRACKER_PREFETCH_TIMEOUT", "10"))
+
+_prefetch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="prefetch")
+
+@perf.traced
+def prefetch(requests, timeout=None, timeouts=None):
+    # requests maps a name to (fn, *args); timeouts optionally overrides the timeout per name
+    started = time.monotonic()
+    futures = {name: _prefetch_pool.submit(perf.bind(fn), *args) for name, (fn, *args) in requests.items()}
+    results = {}
+    for name, future in futures.items():
+        limit = (timeouts or {}).get(name, timeout or PREFETCH_TIMEOUT_SECONDS)
+        try:
+            results[name] = future.result(timeout=max(limit - (time.monotonic() - started), 0))
+        except FutureTimeoutError:
+            results[name] = None
+        except Exception as e:
+            logger.warning("prefetch of %s failed: %r", name, e)
+            results[name] = None
+    return results
+
+# --- Paged loading ---
+# postgrest silently caps how many rows a single select returns, so bulk reads go
+# through keyset pages. whole tables with integer ids are split into fixed id
+# windows that are fetched concurrently. filtered reads page sequentially after the
+# last key instead, so they cost one request per page of matches rather than one per
+# window of the id span; so do other keys (tags are keyed by name).
+PAGE_SIZE = int(os.environ.get("BUDGET_TRACKER_PAGE_SIZE", "1000"))
+PAGE_WORKERS = int(os.environ.get("BUDGET_TRACKER_PAGE_WORKERS", "4"))
+
+def _select(table, columns, key, filters=None):
+    if columns != "*" and key not in columns.split(","):
+        columns = f"{key},{columns}"
+    query = get_client().table(table).select(columns)
+    return filters(query) if filters else query
+
+def _id_bounds(table):
+    first = _select(table, "id", "id").order("id").limit(1).execute().data
+    if not first:
+        return None
+    last = _select(table, "id", "id").order("id", desc=True).limit(1).execute().data
+    return int(first[0]["id"]), int(last[0]["id"])
+
+def _iter_keyset_pages(table, columns, key, page_size, filters=None):
+    last = None
+    while True:
+        query = _select(table, columns, key, filters)
+        if last is not None:
+            query = query.gt(key, last)
+        rows = query.order(key).limit(page_size).execute().data or []
+        if rows:
+            yield pd.DataFrame(rows)
+        if len(rows) < page_size:
+            return
+        last = rows[-1][key]
+
+def iter_table_pages(table, columns="*", page_size=None, workers=None, filters=None):
+    page_size = page_size or PAGE_SIZE
+    workers = workers or PAGE_WORKERS
+    key = PRIMARY_KEYS.get(table, "id")
+    if key != "id" or filters is not None:
+        yield from _iter_keyset_pages(table, columns, key, page_size, filters)
+        return
+
+    bounds = _id_bounds(table)
+    if bounds is None:
+        return
+
+    def fetch(start):
+        query = _select(table, columns, key)
+        return query.gte(key, start).lt(key, start + page_size).order(key).execute().data or []
+
+    # pages come back in id order; at most 2 * workers of them are in flight at once
+    starts = iter(range(bounds[0], bounds[1] + 1, page_size))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(perf.bind(fetch), start) for _, start in zip(range(workers * 2), starts))
+        while pending:
+            rows = pending.popleft().result()
+            next_start = next(starts, None)
+            if next_start is not None:
+                pending.append(pool.submit(perf.bind(fetch), next_start))
+            if rows:
+                yield pd.DataFrame(rows)
+
+@perf.traced
+def load_table(table, columns="*", page_size=None, workers=None, filters=None, prepare=None):
+    chunks = list(iter_table_pages(table, columns, page_size, workers, filters))
+    if not chunks:
+        return pd.DataFrame()
+    # prepared once over the whole table, so categoricals share one set of categories
+    df = pd.concat(chunks, ignore_index=True)
+    return prepare(df) if prepare else df
+
+# --- Snapshot / offline ---
+# every full read of a table refreshes its on-disk snapshot. when supabase can't be
+# reached the reads fall back to the snapshot and the app goes read-only until a
+# background reconcile gets through again.
+RECONCILE_RETRY_SECONDS = float(os.environ.get("BUDGET_TRACKER_RECONCILE_RETRY", "30"))
+
+_offline = threading.Event()
+
+def is_offline():
+    return _offline.is_set()
+
+def _with_snapshot(table, fetch, select=None):
+    # select=None means fetch returns the whole table, which then becomes the snapshot
+    try:
+        df = fetch()
+    except httpx.TransportError:
+        snapshot = load_snapshot(table)
+        if snapshot is None:
+            raise
+        _go_offline()
+        return select(snapshot) if select else snapshot
+    if select is None:
+        save_snapshot_async(table, df)
+    return df
+
+def _go_offline():
+    if not _offline.is_set():
+        _offline.set()
+        _schedule_reconcile(RECONCILE_RETRY_SECONDS)
+
+def _schedule_reconcile(delay=0):
+    timer = threading.Timer(delay, _reconcile)
+    timer.daemon = True
+    timer.start()
+
+def _reconcile():
+    try:
+        _transaction_sync.sync(reconcile=True)
+        get_client().table("tags").select("name").limit(1).execute()
+    except Exception as e:
+        # a 503 from the gateway or a garbled response comes back as an APIError or a
+        # json error rather than a transport error; either way try again later
+        if not isinstance(e, httpx.TransportError):
+            logger.warning("reconcile failed, retrying in %ss: %r", RECONCILE_RETRY_SECONDS, e)
+        _offline.set()
+        _schedule_reconcile(RECONCILE_RETRY_SECONDS)
+        return
+    _offline.clear()
+    invalidate()
+
+# --- Transaction sync ---
+# keeps one local transactions frame per process and only pulls what changed since
+# the last sync: new ids above the id watermark, rows touched after the updated_at
+# watermark (when the table has that column), and rows this process wrote itself.
+# deletions are reconciled by comparing row counts and, only on a mismatch,
+# diffing the id column. without an updated_at column edits made elsewhere are
+# invisible to a delta, so the frame is then fully reloaded every
+# FULL_RELOAD_SECONDS. the month x category x type rollup and, once a search has
+# built it, the description search index are maintained from the same deltas.
+SYNC_MODE = os.environ.get("BUDGET_TRACKER_SYNC", "delta")
+UPDATED_AT_COLUMN = os.environ.get("BUDGET_TRACKER_UPDATED_AT_COLUMN", "updated_at")
+FULL_RELOAD_SECONDS = float(os.environ.get("BUDGET_TRACKER_FULL_RELOAD", "600"))  # 0 disables
+
+# transactions are held in a compact typed schema: categorical category and type,
+# integer cents instead of float amounts, pyarrow-backed descriptions, and the
+# date's day ordinal and yyyymm month key precomputed for filters and group-bys.
+# _prepare_transactions is idempotent, so raw rows and merged frames can both go
+# through it; _raw_transactions turns a frame back into what the table stores.
+CATEGORY_COLUMNS = ['category', 'type']
+DERIVED_COLUMNS = ['amount_cents', 'date_ordinal', 'month_key']
+
+def _categorize(df):
+    # concatenating categoricals with different categories falls back to object
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns and df[column].dtype != 'category':
+            df[column] = df[column].astype('category')
+    return df
+
+def _prepare_transactions(rows):
+    df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+    if df.empty:
+        return df
+    if 'amount' in df.columns:
+        cents = (pd.to_numeric(df['amount'], errors='coerce') * 100).round()
+        if 'amount_cents' in df.columns:
+            cents = cents.fillna(df['amount_cents'])
+        df['amount_cents'] = cents.fillna(0).astype('int64')
+        df = df.drop(columns=['amount'])
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'])
+        df['date_ordinal'] = df['date'].to_numpy().astype('datetime64[D]').astype('int32')
+        df['month_key'] = (df['date'].dt.year * 100 + df['date'].dt.month).astype('int32')
+    if 'description' in df.columns and df['description'].dtype != 'string[pyarrow]':
+        df['description'] = df['description'].astype('string[pyarrow]')
+    return _categorize(df)
+
+def _raw_transactions(df):
+    if df.empty:
+        return df
+    raw = df.drop(columns=[column for column in DERIVED_COLUMNS if column in df.columns])
+    if 'amount_cents' in df.columns:
+        raw['amount'] = df['amount_cents'] / 100
+    if 'date' in raw.columns:
+        raw['date'] = pd.to_datetime(raw['date']).dt.strftime('%Y-%m-%d')
+    if 'month' in raw.columns:
+        raw = raw.drop(columns=['month'])  # snapshots written before the compact schema
+    for column in CATEGORY_COLUMNS + ['description']:
+        if column in raw.columns:
+            raw[column] = raw[column].astype(object).where(raw[column].notna(), None)
+    return raw
+
+class _TransactionSync:
+    def __init__(self):
+        self.frame = None
+        self.max_id = None
+        self.max_updated_at = None
+        self.dirty_ids = set()
+        self.loaded_at = None
+        self.current = False    # the change feed has applied every change since the last sync
+        self.rollup = MonthlyRollup()
+        self.search_index = SearchIndex()
+        self.lock = threading.Lock()
+
+    def mark_dirty(self, *ids):
+        with self.lock:
+            self.dirty_ids.update(ids)
+            self.current = False
+
+    def reset(self):
+        with self.lock:
+            self.frame = None
+            self.search_index.reset()
+
+    def reload_due(self):
+        # only a frame with no updated_at watermark needs the periodic full reload
+        return (SYNC_MODE == "delta" and FULL_RELOAD_SECONDS > 0 and self.frame is not None
+                and self.max_updated_at is None and self.loaded_at is not None
+                and time.monotonic() - self.loaded_at >= FULL_RELOAD_SECONDS)
+
+    def sync(self, reconcile=False):
+        with self.lock:
+            if self.frame is None and not reconcile:
+                # cold start: render from the snapshot now, catch up in the background
+                snapshot = load_snapshot("transactions")
+                if snapshot is not None:
+                    snapshot = _prepare_transactions(snapshot.drop(columns=['month'], errors='ignore'))
+                    self._set_frame(snapshot)
+                    self.rollup.rebuild(snapshot)
+                    self.search_index.reset()
+                    _schedule_reconcile()
+                    return self.frame
+            try:
+                # without an updated_at column a delta can't see edits made while we
+                # were away, so catching up from a snapshot needs a full load
+                if SYNC_MODE != "delta" or self.frame is None or 'id' not in self.frame.columns \
+                        or (reconcile and self.max_updated_at is None) or self.reload_due():
+                    self._full_load()
+                elif not self.current or reconcile:
+                    self._delta_load()
+            except httpx.TransportError:
+                if self.frame is None or reconcile:
+                    raise
+                _go_offline()
+                return self.frame
+            self.current = False
+            save_snapshot_async("transactions", self.frame)
+            return self.frame
+
+    def _full_load(self):
+        self.dirty_ids.clear()
+        self._set_frame(load_table("transactions", prepare=_prepare_transactions))
+        self.loaded_at = time.monotonic()
+        self.rollup.rebuild(self.frame)
+        self.search_index.reset()
+
+    def _delta_load(self):
+        table = lambda: get_client().table("transactions")
+        max_id, max_updated_at = self.max_id, self.max_updated_at
+        changed = [load_table("transactions", filters=lambda query: query.gt("id", max_id))]
+        if max_updated_at is not None:
+            changed.append(load_table("transactions", filters=lambda query: query.gt(UPDATED_AT_COLUMN, max_updated_at)))
+        # chunked so a large delete_rows doesn't turn into one very long url
+        def by_id(ids):
+            return [pd.DataFrame(table().select("*").in_("id", chunk).execute().data or []) for chunk in _chunks(ids)]
+
+        dirty = list(self.dirty_ids)
+        changed += by_id(dirty)
+        delta = _prepare_transactions(pd.concat(changed, ignore_index=True))
+        touched, frame = self._merge(delta, dirty)
+
+        count = table().select("id", count="exact").limit(1).execute().count
+        if count is not None and count != len(frame):
+            ids = load_table("transactions", columns="id")
+            server_ids = ids['id'].to_numpy(dtype='int64') if not ids.empty else np.empty(0, dtype='int64')
+            frame = frame[frame['id'].isin(server_ids)]
+            # rows committed below the id watermark after it moved past them
+            missing = np.setdiff1d(server_ids, frame['id'].to_numpy()).tolist()
+            if missing:
+                late = _prepare_transactions(pd.concat(by_id(missing), ignore_index=True))
+                if not late.empty:
+                    frame = _categorize(pd.concat([frame, late], ignore_index=True))
+                    touched |= set(late['id'])
+
+        self._replace(frame, touched)
+        self.dirty_ids.difference_update(dirty)
+
+    def apply_changes(self, records, deleted_ids, complete=False):
+        # rows from the change feed, merged like a delta load. the id and updated_at
+        # watermarks stay where the last sync left them, so a later delta load still
+        # picks up any row the feed skipped. complete means the events carried every
+        # change, so the next sync can skip its delta load.
+        with self.lock:
+            if self.frame is None or 'id' not in self.frame.columns:
+                return
+            watermarks = self.max_id, self.max_updated_at
+            delta = _prepare_transactions(pd.DataFrame(records)) if records else pd.DataFrame()
+            touched, frame = self._merge(delta, deleted_ids)
+            self._replace(frame, touched)
+            self.max_id, self.max_updated_at = watermarks
+            self.current = complete and not self.dirty_ids
+
+    def _merge(self, delta, removed_ids):
+        # the frame with delta's rows replacing (or adding to) the ones they share an id with
+        if not delta.empty:
+            delta = delta.drop_duplicates(subset='id', keep='last')
+        touched = set(removed_ids) | (set(delta['id']) if not delta.empty else set())
+        frame = self.frame[~self.frame['id'].isin(touched)]
+        if not delta.empty:
+            frame = _categorize(pd.concat([frame, delta], ignore_index=True))
+        return touched, frame
+
+    def _replace(self, frame, touched):
+        previous = self.frame
+        self._set_frame(frame.sort_values('id', ignore_index=True))
+        removed = previous[previous['id'].isin(touched) | ~previous['id'].isin(self.frame['id'])]
+        added = self.frame[self.frame['id'].isin(touched)]
+        self.rollup.apply(removed, added)
+        if self.search_index.built:
+            self.search_index.apply(removed, added)
+
+    def search(self, text):
+        # the index is built from the frame on the first search and kept current after
+        with self.lock:
+            if not self.search_index.built and self.frame is not None:
+                self.search_index.rebuild(self.frame)
+        return self.search_index.search(text)
+
+    def _set_frame(self, df):
+        self.frame = df
+        self.max_id = int(df['id'].max()) if 'id' in df.columns and not df.empty else 0
+        if UPDATED_AT_COLUMN in df.columns and not df.empty:
+            self.max_updated_at = df[UPDATED_AT_COLUMN].max()
+        else:
+            self.max_updated_at = None
+
+_transaction_sync = _TransactionSync()
+
+# --- Change feed ---
+# writes from other processes (another replica, the importer cli, the supabase
+# dashboard) never bump this process's table versions, so cached reads would stay
+# stale until a local write. a feed thread turns row-change events into version
+# bumps. events that carry the row are applied straight to the shared transactions
+# frame, and when all of them did the next read uses it without a delta load.
+# supabase-py 1.0 ships without realtime, so the default feed polls a cheap
+# per-table signature, which only says that something changed; change_feed.QueueFeed
+# is a local stand-in for a realtime subscription.
+CHANGE_FEED = os.environ.get("BUDGET_TRACKER_CHANGE_FEED", "poll")  # poll | off
+CHANGE_FEED_INTERVAL_SECONDS = float(os.environ.get("BUDGET_TRACKER_CHANGE_FEED_INTERVAL", "5"))
+
+_feed_lock = threading.Lock()
+_feed_thread = None
+_feed_stop = None
+
+def apply_changes(events):
+    records, deleted_ids, complete = [], [], True
+    for event in events:
+        if event.table != "transactions":
+            continue
+        if event.type == "delete" and (event.old_record or event.record or {}).get("id") is not None:
+            deleted_ids.append((event.old_record or event.record)["id"])
+        elif event.type in ("insert", "update") and event.record:
+            records.append(event.record)
+        else:
+            complete = False
+    if records or deleted_ids:
+        _transaction_sync.apply_changes(records, deleted_ids, complete)
+    elif not complete:
+        _transaction_sync.mark_dirty()  # only told that something changed, so the next read asks
+    invalidate(*{event.table for event in events})
+
+def start_change_feed(feed=None):
+    # once per process unless a feed is passed in, which replaces the running one
+    global _feed_thread, _feed_stop
+    with _feed_lock:
+        if feed is None and (_feed_thread is not None or CHANGE_FEED == "off"):
+            return
+        if _feed_stop is not None:
+            _feed_stop.set()
+        feed = feed or PollingFeed(get_client, PRIMARY_KEYS, CHANGE_FEED_INTERVAL_SECONDS, UPDATED_AT_COLUMN)
+        stop = _feed_stop = threading.Event()
+
+        def follow():
+            while not stop.is_set():
+                try:
+                    events = feed.poll(timeout=1.0)
+                    if events and not stop.is_set():
+                        apply_changes(events)
+                    if _transaction_sync.reload_due():
+                        invalidate("transactions")  # the next read does the full reload
+                except Exception as e:
+                    logger.warning("change feed failed: %r", e)
+                    stop.wait(CHANGE_FEED_INTERVAL_SECONDS)
+
+        _feed_thread = threading.Thread(target=follow, name="change-feed", daemon=True)
+        _feed_thread.start()
+
+def stop_change_feed():
+    global _feed_thread, _feed_stop
+    with _feed_lock:
+        if _feed_stop is not None:
+            _feed_stop.set()
+        _feed_thread = _feed_stop = None
 
 # --- Transactions ---
+@_cached("transactions")
+def _fetch_transactions():
+    return _transaction_sync.sync()
+
+@_cached("transactions")
+def _fetch_rollup():
+    monthly_rollup = _native("monthly_rollup")
+    if monthly_rollup is not None:
+        return MonthlyRollup.from_rows(monthly_rollup())
+    _fetch_transactions()
+    with _transaction_sync.lock:
+        return _transaction_sync.rollup.copy()
+
+@perf.traced
+def get_rollup():
+    rollup = _fetch_rollup()
+    if not _write_queue.pending("transactions"):
+        return rollup
+    _, removed, added = _overlay("transactions", _fetch_transactions(), _prepare_transactions)
+    if removed is not None:
+        rollup = rollup.copy()
+        rollup.apply(removed, added)
+    return rollup
+
+@perf.traced
 def load_transactions():
-    response = supabase.table("transactions").select("*").execute()
-    if not response.data:
+    df, _, _ = _overlay("transactions", _fetch_transactions(), _prepare_transactions)
+    if df.empty:
         st.warning("⚠️ no transactions found or error fetching data.")
-        return pd.DataFrame()
-    
-    df = pd.DataFrame(response.data)
-    if not df.empty and 'date' in df.columns:
-        df['date'] = pd.to_datetime(df['date'])
-        df['month'] = df['date'].dt.to_period('M').astype(str)
     return df
 
+def sync_transactions():
+    # the frame caught up with the server right now, with queued writes applied. unlike
+    # load_transactions it never answers from the cold-start snapshot or offline, so
+    # it's what dedupe checks against
+    frame = _transaction_sync.sync(reconcile=True)
+    invalidate("transactions")
+    df, _, _ = _overlay("transactions", frame, _prepare_transactions)
+    return df
+
+@_invalidates("transactions")
 def insert_transaction(transaction):
-    return supabase.table("transactions").insert(transaction).execute()
+    return get_client().table("transactions").insert(transaction).execute()
 
+@_invalidates("transactions")
 def update_transaction(id, date, category, description, amount, type_):
-    return supabase.table("transactions").update({
+    _transaction_sync.mark_dirty(id)
+    return get_client().table("transactions").update({
         "date": date,
         "category": category,
         "description": description,
@@ -35,67 +702,465 @@ def update_transaction(id, date, category, description, amount, type_):
         "type": type_
     }).eq("id", id).execute()
 
+@_invalidates("transactions")
 def delete_transaction(id):
-    return supabase.table("transactions").delete().eq("id", id).execute()
+    _transaction_sync.mark_dirty(id)
+    return get_client().table("transactions").delete().eq("id", id).execute()
+
+# --- Transaction queries ---
+# the transaction tab's filters are applied server-side so only matching rows come
+# over the wire. categories must be a tuple so the call can be cached. while the
+# server can't be reached the same reads are answered from the synced frame (or its
+# snapshot) with the filters applied locally, so the tab stays usable, read-only.
+def _filter_transactions(query, start=None, end=None, min_amount=None, max_amount=None, categories=None):
+    if start is not None:
+        query = query.gte("date", str(start))
+    if end is not None:
+        query = query.lte("date", str(end))
+    if min_amount is not None:
+        query = query.gte("amount", min_amount)
+    if max_amount is not None:
+        query = query.lte("amount", max_amount)
+    if categories:
+        query = query.in_("category", list(categories))
+    return query
+
+def _order(query, column, desc):
+    # id breaks ties so offset pages stay stable; postgrest-py only takes one column
+    # per order() call, hence the hand-built "col.desc,id" value
+    return query.order(f"{column}{'.desc' if desc else ''},id")
+
+def _sort_transactions(df, order, desc):
+    column = 'amount_cents' if order == 'amount' else order
+    return df.sort_values([column, 'id'], ascending=not desc, ignore_index=True)
+
+def _page(df, order, desc, limit=None, offset=0):
+    if order != "relevance" and not df.empty:
+        df = _sort_transactions(df, order, desc)
+    return df.iloc[offset:None if limit is None else offset + limit].reset_index(drop=True)
+
+def _served_locally(local):
+    # local takes the same arguments and answers from the synced frame with queued
+    # writes applied. it answers while offline, and also while transaction writes are
+    # queued, so a row just added shows up before the write is flushed.
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not is_offline() and not _write_queue.pending("transactions"):
+                try:
+                    return fn(*args, **kwargs)
+                except httpx.TransportError:
+                    _go_offline()
+            return local(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _local_frame():
+    df, _, _ = _overlay("transactions", _fetch_transactions(), _prepare_transactions)
+    return df
+
+def _local_matches(start=None, end=None, min_amount=None, max_amount=None, categories=None, search=None):
+    # searches only see synced rows, queued ones join them once they're flushed
+    if search:
+        return search_transactions(search, start, end, min_amount, max_amount, categories)
+    frame = _local_frame()
+    if frame.empty:
+        return frame
+    return _filter_frame(frame, start, end, min_amount, max_amount, categories)
+
+def _query_locally(start=None, end=None, min_amount=None, max_amount=None, categories=None,
+                   order="date", desc=True, limit=None, offset=0, search=None):
+    matches = _local_matches(start, end, min_amount, max_amount, categories, search)
+    return _page(matches, order, desc, limit, offset)
+
+def _count_locally(start=None, end=None, min_amount=None, max_amount=None, categories=None, search=None):
+    return len(_local_matches(start, end, min_amount, max_amount, categories, search))
+
+def _bounds_locally():
+    frame = _local_frame()
+    if frame.empty:
+        return {}
+    return {
+        "min_date": frame['date'].min().date(),
+        "max_date": frame['date'].max().date(),
+        "min_amount": float(frame['amount_cents'].min() / 100),
+        "max_amount": float(frame['amount_cents'].max() / 100),
+    }
+
+@_served_locally(_query_locally)
+@_cached("transactions")
+def query_transactions(start=None, end=None, min_amount=None, max_amount=None, categories=None,
+                       order="date", desc=True, limit=None, offset=0, search=None):
+    if search:
+        return _page(search_transactions(search, start, end, min_amount, max_amount, categories),
+                     order, desc, limit, offset)
+    filters = lambda query: _filter_transactions(query, start, end, min_amount, max_amount, categories)
+    if limit is None:
+        df = load_table("transactions", filters=filters, prepare=_prepare_transactions)
+        if not df.empty:
+            df = _sort_transactions(df, order, desc).iloc[offset:]
+        return df
+    query = _order(filters(get_client().table("transactions").select("*")), order, desc)
+    # range() takes an exclusive end in this postgrest-py version
+    response = query.range(offset, offset + limit).execute()
+    return _prepare_transactions(response.data or [])
+
+@_served_locally(_count_locally)
+@_cached("transactions")
+def count_transactions(start=None, end=None, min_amount=None, max_amount=None, categories=None, search=None):
+    if search:
+        return len(search_transactions(search, start, end, min_amount, max_amount, categories))
+    query = get_client().table("transactions").select("id", count="exact")
+    query = _filter_transactions(query, start, end, min_amount, max_amount, categories)
+    return query.limit(1).execute().count or 0
+
+def iter_transactions(start=None, end=None, min_amount=None, max_amount=None, categories=None,
+                      search=None, page_size=None):
+    # the filtered rows as raw pages in id order, for exports. table pages stream from
+    # the backend with a bounded number in flight; searches are served from the frame
+    # the index already holds, sliced into pages of the same size.
+    page_size = page_size or PAGE_SIZE
+    if search:
+        matches = search_transactions(search, start, end, min_amount, max_amount, categories)
+        matches = matches.sort_values('id', ignore_index=True) if not matches.empty else matches
+        for offset in range(0, len(matches), page_size):
+            yield _raw_transactions(matches.iloc[offset:offset + page_size])
+        return
+    filters = lambda query: _filter_transactions(query, start, end, min_amount, max_amount, categories)
+    yield from iter_table_pages("transactions", page_size=page_size, filters=filters)
+
+# --- Transaction search ---
+# text search goes through the in-process index over description and category (see
+# modules/search.py). matches are looked up in the synced frame by id and the other
+# filters run on its compact columns, so searching costs no request and combines
+# with the date, amount and category filters. results are best match first.
+def _day(value):
+    return int(pd.Timestamp(value).to_datetime64().astype('datetime64[D]').astype('int64'))
+
+def _filter_frame(df, start=None, end=None, min_amount=None, max_amount=None, categories=None):
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None:
+        mask &= df['date_ordinal'].to_numpy() >= _day(start)
+    if end is not None:
+        mask &= df['date_ordinal'].to_numpy() <= _day(end)
+    if min_amount is not None:
+        mask &= df['amount_cents'].to_numpy() >= round(min_amount * 100)
+    if max_amount is not None:
+        mask &= df['amount_cents'].to_numpy() <= round(max_amount * 100)
+    if categories:
+        mask &= df['category'].isin(categories).to_numpy()
+    return df[mask]
+
+@_cached("transactions")
+def search_transactions(text, start=None, end=None, min_amount=None, max_amount=None, categories=None):
+    frame = _fetch_transactions()
+    ids = _transaction_sync.search(text)
+    if ids is None or not len(ids) or frame.empty:
+        return frame.iloc[:0]
+    # the synced frame is kept in id order
+    frame_ids = frame['id'].to_numpy()
+    positions = np.searchsorted(frame_ids, ids).clip(max=len(frame_ids) - 1)
+    found = frame_ids[positions] == ids
+    matches = frame.iloc[positions[found]]
+    return _filter_frame(matches, start, end, min_amount, max_amount, categories).reset_index(drop=True)
+
+@_served_locally(_bounds_locally)
+@_cached("transactions")
+def get_transaction_bounds():
+    # min/max via order + limit 1 on each column instead of scanning the table
+    def edge(column, desc):
+        rows = get_client().table("transactions").select(column).order(column, desc=desc).limit(1).execute().data
+        return rows[0][column] if rows else None
+
+    min_date = edge("date", False)
+    if min_date is None:
+        return {}
+    return {
+        "min_date": pd.to_datetime(min_date).date(),
+        "max_date": pd.to_datetime(edge("date", True)).date(),
+        "min_amount": float(edge("amount", False)),
+        "max_amount": float(edge("amount", True)),
+    }
 
 # --- Budgets ---
+@perf.traced
 def load_budget(month):
-    response = supabase.table("budgets").select("*").eq("month", month).execute()
-    if not response.data:
+    df, _, _ = _overlay("budgets", _fetch_budget(month))
+    if 'month' in df.columns:
+        df = df[df['month'] == month]
+    if df.empty:
         return pd.DataFrame()
-    return pd.DataFrame(response.data)
+    return df
 
+@_cached("budgets")
+def _fetch_budget(month):
+    return _with_snapshot(
+        "budgets",
+        lambda: pd.DataFrame(get_client().table("budgets").select("*").eq("month", month).execute().data or []),
+        select=lambda snapshot: snapshot[snapshot['month'] == month],
+    )
+
+@perf.traced
+def load_budgets(start_month, end_month):
+    # every budget row from start_month through end_month ("YYYY-MM", inclusive)
+    df, _, _ = _overlay("budgets", _fetch_budgets(start_month, end_month))
+    if 'month' in df.columns:
+        df = df[(df['month'] >= start_month) & (df['month'] <= end_month)]
+    if df.empty:
+        return pd.DataFrame()
+    return df
+
+@_cached("budgets")
+def _fetch_budgets(start_month, end_month):
+    # one paged range read instead of a request per month
+    return _with_snapshot(
+        "budgets",
+        lambda: load_table("budgets", filters=lambda query: query.gte("month", start_month).lte("month", end_month)),
+        select=lambda snapshot: snapshot[(snapshot['month'] >= start_month) & (snapshot['month'] <= end_month)],
+    )
+
+@_invalidates("budgets")
 def insert_budget(budget):
-    return supabase.table("budgets").insert(budget).execute()
+    return get_client().table("budgets").insert(budget).execute()
 
+@_invalidates("budgets")
 def update_budget(id, month, category, amount):
-    return supabase.table("budgets").update({
+    return get_client().table("budgets").update({
         "month": month,
         "category": category,
         "amount": amount
     }).eq("id", id).execute()
 
 # --- Tags ---
+@_cached("tags")
+def _fetch_tags():
+    return _with_snapshot("tags", lambda: pd.DataFrame(get_client().table("tags").select("*").execute().data or []))
+
+@perf.traced
 def load_tags():
-    response = supabase.table("tags").select("*").execute()
-    if not response.data:
+    df, _, _ = _overlay("tags", _fetch_tags())
+    if df.empty:
         st.error("error fetching tags.")
-        return pd.DataFrame()
-    df = pd.DataFrame(response.data)
+        return {}
     return dict(zip(df['name'], df['color']))
 
+@_invalidates("tags")
 def insert_or_update_tag(name, color):
-    return supabase.table("tags").upsert({
+    return get_client().table("tags").upsert({
         "name": name,
         "color": color
     }).execute()
 
+@_invalidates("tags")
 def update_tag(current_name, new_name, new_color):
-    return supabase.table("tags").update({
+    return get_client().table("tags").update({
         "name": new_name,
         "color": new_color
     }).eq("name", current_name).execute()
 
 # --- General ---
+# the database tab's tables, each cached on its own version. transactions come from
+# the synced frame instead of a second download of the whole table.
+GRID_COLUMNS = ['id', 'date', 'category', 'description', 'amount', 'type']
+
+@_cached("transactions")
+def _fetch_transaction_table():
+    raw = _raw_transactions(_fetch_transactions())
+    return raw[[c for c in GRID_COLUMNS if c in raw.columns] + [c for c in raw.columns if c not in GRID_COLUMNS]]
+
+@_cached("budgets")
+def _fetch_budget_table():
+    return _with_snapshot("budgets", lambda: load_table("budgets"))
+
+@_cached()
+def _fetch_any_table(name):
+    return _with_snapshot(name, lambda: load_table(name))
+
+def _fetch_table(name):
+    if name == "transactions":
+        return _fetch_transaction_table()
+    if name == "budgets":
+        return _fetch_budget_table()
+    if name == "tags":
+        return _fetch_tags()
+    return _fetch_any_table(name)
+
+@perf.traced
 def get_table_data(name):
-    response = supabase.table(name).select("*").execute()
-    if not response.data:
+    df, _, _ = _overlay(name, _fetch_table(name))
+    if df.empty:
         error_msg = "error fetching table data: " + name
         st.error(error_msg)
-        return pd.DataFrame()
-    return pd.DataFrame(response.data)
+    return df
 
 def delete_row(table, row_id):
-    return supabase.table(table).delete().eq("id", row_id).execute()
+    return delete_rows(table, [row_id])
+
+@_cached("budgets")
+def _fetch_budget_months():
+    return _native("distinct")("budgets", "month")
 
+@perf.traced
 def get_all_budget_months():
-    response = supabase.table("budgets").select("month").execute()
-    if not response.data:
+    if _native("distinct") is not None and not _write_queue.pending("budgets"):
+        return _fetch_budget_months()
+    # budgets are small; reading the whole table keeps its snapshot fresh for offline use
+    df, _, _ = _overlay("budgets", _fetch_table("budgets"))
+    if df.empty or 'month' not in df.columns:
         return []
-    return list({entry['month'] for entry in response.data if 'month' in entry})
+    return df['month'].dropna().unique().tolist()
 
+@perf.traced
 def get_all_transaction_months():
-    df = load_transactions()
-    if df.empty or 'month' not in df.columns:
-        return []
-    return df['month'].dropna().unique().tolist()
\ No newline at end of file
+    return get_rollup().months()
+
+# --- Batch writes ---
+# one request per chunk of BATCH_SIZE rows; retries happen in the client's transport.
+BATCH_SIZE = int(os.environ.get("BUDGET_TRACKER_BATCH_SIZE", "500"))
+
+def _chunks(items, size=None):
+    items = list(items)
+    size = size or BATCH_SIZE
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _write_batches(table, rows, build):
+    written = []
+    try:
+        for chunk in _chunks(rows):
+            written += build(get_client().table(table), chunk).execute().data or []
+    finally:
+        _written(table)
+    return written
+
+@perf.traced
+def insert_rows(table, rows):
+    return _write_batches(table, rows, lambda query, chunk: query.insert(chunk))
+
+@perf.traced
+def upsert_rows(table, rows):
+    # rows must be complete, including the primary key; this is also how several
+    # rows with different values are updated in one request
+    if table == "transactions":
+        _transaction_sync.mark_dirty(*(row["id"] for row in rows if "id" in row))
+    key = PRIMARY_KEYS.get(table, "id")
+    return _write_batches(table, rows, lambda query, chunk: query.upsert(chunk, on_conflict=key))
+
+@perf.traced
+def update_row(table, key, row):
+    if table == "transactions":
+        _transaction_sync.mark_dirty(key)
+    pk = PRIMARY_KEYS.get(table, "id")
+    try:
+        return get_client().table(table).update(row).eq(pk, key).execute().data
+    finally:
+        _written(table)
+
+@perf.traced
+def delete_rows(table, ids):
+    ids = list(ids)
+    if table == "transactions":
+        _transaction_sync.mark_dirty(*ids)
+    key = PRIMARY_KEYS.get(table, "id")
+    return _write_batches(table, ids, lambda query, chunk: query.delete().in_(key, chunk))
+
+def insert_transactions(rows):
+    return insert_rows("transactions", rows)
+
+def update_transactions(rows):
+    return upsert_rows("transactions", rows)
+
+def upsert_tags(mapping):
+    return upsert_rows("tags", [{"name": name, "color": color} for name, color in mapping.items()])
+
+# --- Write-behind ---
+# ui writes go through the queue: they show up at once because every read below
+# overlays the pending writes on the cached frames, and modules/write_queue.py
+# sends them in the background. a write that fails for good simply drops out of
+# the overlay and is reported through pop_failed_writes().
+def _flush_writes(table, op, writes):
+    if op == "insert":
+        written = insert_rows(table, [write.row for write in writes])
+        return [row.get(PRIMARY_KEYS.get(table, "id")) for row in written]
+    if op == "upsert":
+        upsert_rows(table, [write.row for write in writes])
+    elif op == "delete":
+        delete_rows(table, [write.key for write in writes])
+    else:
+        # queued updates are whole rows, so they go out as one upsert; only a write
+        # that changes a natural primary key (a tag rename) needs its own update. ids
+        # aren't editable, and a row edited before its insert was sent still carries
+        # the temp id its key has since been remapped from.
+        pk = PRIMARY_KEYS.get(table, "id")
+        rows, renames = [], []
+        for write in writes:
+            if pk != "id" and write.row.get(pk, write.key) != write.key:
+                renames.append(write)
+            else:
+                rows.append({**write.row, pk: write.key})
+        if rows:
+            upsert_rows(table, rows)
+        for write in renames:
+            update_row(table, write.key, write.row)
+
+def _is_transient(op, error):
+    # an insert that may have reached the server isn't retried, so it can't land twice
+    if op == "insert":
+        return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout))
+    return isinstance(error, httpx.TransportError)
+
+_write_queue = WriteQueue(_flush_writes, _is_transient)
+
+def _session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+def _overlay(table, df, prepare=None):
+    # returns the frame with pending writes applied, plus the rows they replaced and
+    # the rows they produced (None, None when nothing is pending)
+    writes = _write_queue.pending(table)
+    if not writes:
+        return df, None, None
+
+    pk = PRIMARY_KEYS.get(table, "id")
+    keys = {write.key for write in writes}
+    touched = df[pk].isin(keys) if pk in df.columns else pd.Series(False, index=df.index)
+    rows = {row[pk]: row for row in df[touched].to_dict("records")}
+    for write in writes:
+        current = rows.get(write.key)
+        if write.op == "delete":
+            rows[write.key] = None
+        elif write.op in ("insert", "upsert"):
+            rows[write.key] = {**(current or {}), **write.row, pk: write.key}
+        elif current is not None:
+            rows[write.key] = {**current, **write.row}
+
+    added = pd.DataFrame([row for row in rows.values() if row is not None])
+    if prepare is not None:
+        added = prepare(added)
+    removed = df[touched]
+    merged = pd.concat([df[~touched], added], ignore_index=True)
+    for column in df.columns[df.dtypes == 'category']:
+        merged[column] = merged[column].astype('category')
+    return merged, removed, added
+
+def queue_insert(table, row):
+    key = row.get(PRIMARY_KEYS.get(table, "id")) or _write_queue.next_temp_id()
+    _write_queue.enqueue(PendingWrite(table, "insert", key, row, _session_id()))
+    return key
+
+def queue_upsert(table, row):
+    key = row[PRIMARY_KEYS.get(table, "id")]
+    _write_queue.enqueue(PendingWrite(table, "upsert", key, row, _session_id()))
+
+def queue_update(table, key, row):
+    _write_queue.enqueue(PendingWrite(table, "update", key, row, _session_id()))
+
+def queue_delete(table, key):
+    _write_queue.enqueue(PendingWrite(table, "delete", key, None, _session_id()))
+
+def pop_failed_writes():
+    return _write_queue.pop_failures(_session_id())
+
+def has_pending_writes(table):
+    return bool(_write_queue.pending(table))
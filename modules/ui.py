@@ -1,26 +1,103 @@
 import streamlit as st
 import datetime
+import html
+import os
+import tempfile
+import threading
+from collections import deque
+from functools import wraps
 import pandas as pd
 import altair as alt
+from cachetools import LRUCache
 from modules.supabase_db import (
-    load_transactions, insert_transaction, update_transaction, delete_transaction,
-    load_budget, insert_budget, update_budget,
-    load_tags, insert_or_update_tag, update_tag,
-    get_table_data, delete_row, get_all_budget_months, get_all_transaction_months
+    load_budget, load_budgets, load_tags, get_table_data, query_transactions, count_transactions,
+    is_offline, data_version, queue_insert, queue_upsert, queue_update, queue_delete,
+    has_pending_writes, PRIMARY_KEYS,
 )
-import time
+from modules import perf
+from modules.analytics import budget_trends, monthly_totals, progress_labels
+from modules.rollups import budget_vs_actual
+from modules.importer import import_statement, DEFAULT_CATEGORY
+from modules.exporter import export_transactions, export_rollup, FORMATS, MIME_TYPES
+
+def _still_loading(what):
+    st.info(f"⏳ {what} still loading – it will show up on the next rerun.")
+
+# --- Perf ---
+# ?perf=1 turns recording on for the session and shows the panel at the bottom of
+# the page; BUDGET_TRACKER_PERF_LOG records every rerun of every session to a file.
+PERF_RUNS_KEPT = 20
+
+def perf_enabled():
+    return bool(perf.PERF_LOG) or st.session_state.get("perf_panel", False)
+
+def _keep_run(record):
+    st.session_state.setdefault("perf_runs", deque(maxlen=PERF_RUNS_KEPT)).append(record)
+
+def start_rerun_recording(tab):
+    if not perf_enabled():
+        return None
+    return perf.start_run("rerun", profile=st.session_state.get("perf_profile", False), tab=tab)
+
+def finish_rerun_recording(run):
+    if run is not None:
+        _keep_run(perf.finish_run(run))
+
+def _recorded(name):
+    # a section of the rerun; a fragment rerunning by itself is recorded as its own run
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with perf.recording(name, enabled=perf_enabled(), tab=name) as record:
+                result = fn(*args, **kwargs)
+            if record:
+                _keep_run(record)
+            return result
+        return wrapper
+    return decorator
+
+def render_perf_panel():
+    runs = list(st.session_state.get("perf_runs", []))
+    with st.expander("⏱️ perf"):
+        st.checkbox("profile reruns with cProfile", key="perf_profile")
+        if not runs:
+            st.caption("nothing recorded yet.")
+            return
+        summary = pd.DataFrame([
+            {"at": run["at"], "run": run["run"], "tab": run.get("tab"), "seconds": run["seconds"],
+             "calls": len(run["calls"]), "http requests": run["http"]["requests"],
+             "http bytes": run["http"]["bytes"], "http seconds": round(run["http"]["seconds"], 3)}
+            for run in reversed(runs)
+        ])
+        st.dataframe(summary, hide_index=True, use_container_width=True)
+
+        index = st.selectbox("run", range(len(runs)), format_func=lambda i: f"{summary['at'][i]} · {summary['run'][i]}")
+        run = runs[-1 - index]
+        st.markdown("**supabase_db calls**")
+        st.dataframe(pd.DataFrame(run["calls"]), hide_index=True, use_container_width=True)
+        st.markdown("**render sections**")
+        st.dataframe(pd.DataFrame(run["sections"]), hide_index=True, use_container_width=True)
+        if run["profile"]:
+            st.markdown("**cProfile (top by cumulative time)**")
+            st.dataframe(pd.DataFrame(run["profile"]), hide_index=True, use_container_width=True)
 
 # --- Overview Tab ---
-def render_overview_tab():
-    df = load_transactions()
-    if df.empty:
+# tabs and their expensive sections are fragments: a widget change inside one
+# reruns just that fragment, and writes still trigger a full st.rerun().
+@st.fragment
+@_recorded("overview")
+def render_overview_tab(rollup):
+    if rollup is None:
+        _still_loading("transactions are")
+        return
+    if rollup.empty:
         return
 
-    selected_month = st.selectbox("select month to view", sorted(get_all_transaction_months(), reverse=True))
-    month_data = df[df['month'] == selected_month]
+    selected_month = st.selectbox("select month to view", sorted(rollup.months(), reverse=True))
+    totals = rollup.totals(selected_month)
 
-    income = month_data[month_data['type'] == 'income']['amount'].sum()
-    expenses = month_data[month_data['type'] == 'expense']['amount'].sum()
+    income = totals.get('income', 0.0)
+    expenses = totals.get('expense', 0.0)
     net_left = income - expenses
 
     col1, col2, col3 = st.columns(3)
@@ -34,72 +111,29 @@ def render_overview_tab():
     if budget_df.empty:
         st.info("no budget set for this month.")
     else:
-        budget_df = (
-            budget_df.rename(columns={"amount": "budgeted_amount"})
-                    .groupby('category', as_index=False)['budgeted_amount']
-                    .sum()
-        )
-        actuals = (
-            month_data[month_data['type'].str.lower() == 'expense']
-            .groupby('category')['amount']
-            .sum()
-            .reset_index()
-            .rename(columns={'amount': 'actual_spent'})
-        )
-        progress_df = pd.merge(budget_df, actuals, on='category', how='left')
-        progress_df['actual_spent'] = progress_df['actual_spent'].fillna(0)
-
-        for _, row in progress_df.iterrows():
-            spent = row['actual_spent']
-            budget = row['budgeted_amount']
-            percent_used = spent / budget if budget > 0 else 0
-            percent_spent = min(percent_used, 1.0)
-            percent_left = max(1.0 - percent_spent, 0) * 100
-
-            if percent_used > 1:
-                emoji = "⛔"
-                percent_over = (percent_used - 1.0) * 100
-                label = (
-                    f"{emoji} {row['category']}: "
-                    f"&#36;{spent:,.2f} of &#36;{budget:,.2f} spent "
-                    f"(<span style='color:red;'>{percent_over:.0f}% OVER</span>)"
-                )
-            elif percent_used >= 0.75:
-                emoji = "⚠️"
-                label = (
-                    f"{emoji} {row['category']}: "
-                    f"&#36;{spent:,.2f} of &#36;{budget:,.2f} spent ({percent_left:.0f}% left)"
-                )
-            else:
-                emoji = "✅"
-                label = (
-                    f"{emoji} {row['category']}: "
-                    f"&#36;{spent:,.2f} of &#36;{budget:,.2f} spent ({percent_left:.0f}% left)"
-                )
+        progress_df = budget_vs_actual(budget_df, rollup, selected_month)
+        labels = progress_labels(progress_df['category'], progress_df['actual_spent'], progress_df['budgeted_amount'])
 
+        for label, progress in zip(labels['label'], labels['progress']):
             st.markdown(label, unsafe_allow_html=True)
-            st.progress(percent_spent)
+            st.progress(float(progress))
 
     st.subheader("expense breakdown")
-    breakdown = (
-        month_data[month_data['type'] == 'expense']
-        .groupby('category')['amount']
-        .sum()
-        .reset_index()
-        .sort_values(by='amount', ascending=False)
-    )
+    breakdown = rollup.by_category(selected_month, 'expense')
 
     if not breakdown.empty:
-        bar = alt.Chart(breakdown).mark_bar().encode(
-            x=alt.X('category:N', sort='-y', axis=alt.Axis(labelAngle=0), title="category"),
-            y=alt.Y('amount:Q', title="amount (CAD)"),
-            tooltip=['category', 'amount']
-        ).properties(width=700, height=400)
-        st.altair_chart(bar, use_container_width=True)
+        with perf.section("overview: expense chart"):
+            bar = alt.Chart(breakdown).mark_bar().encode(
+                x=alt.X('category:N', sort='-y', axis=alt.Axis(labelAngle=0), title="category"),
+                y=alt.Y('amount:Q', title="amount (CAD)"),
+                tooltip=['category', 'amount']
+            ).properties(width=700, height=400)
+            st.altair_chart(bar, use_container_width=True)
     else:
         st.info("no expenses recorded for this month.")
 
-def render_transaction_tab(df):
+@_recorded("transactions")
+def render_transaction_tab(bounds):
     st.subheader("add new transaction")
     tags = load_tags()
 
@@ -112,23 +146,46 @@ def render_transaction_tab(df):
         amount = st.number_input("amount", min_value=0.0, format="%.2f")
         type_ = st.selectbox("type", ["expense", "income"])
 
-        submitted = st.form_submit_button("add transaction")
+        submitted = st.form_submit_button("add transaction", disabled=is_offline())
 
         if submitted:
-            response = insert_transaction({
+            queue_insert("transactions", {
                 "date": str(date),
                 "category": category.strip(),
                 "description": description.strip(),
                 "amount": amount,
                 "type": type_
             })
+            st.toast("✅ transaction added!")
+            st.rerun()
+
+    st.subheader("import statement")
+
+    with st.form("import_statement_form"):
+        statement = st.file_uploader("bank statement", type=["csv", "ofx", "qfx"])
+        categories = list(tags.keys())
+        default_category = st.selectbox(
+            "category for rows without one", categories,
+            index=categories.index(DEFAULT_CATEGORY) if DEFAULT_CATEGORY in categories else 0
+        )
+        import_submit = st.form_submit_button("import", disabled=is_offline())
+
+        if import_submit and statement is not None:
+            fmt = statement.name.rsplit(".", 1)[-1].lower()
+            progress_bar = st.progress(0.0)
+            status = st.empty()
+
+            def report(rows_read, inserted, skipped):
+                progress_bar.progress(min(statement.tell() / max(statement.size, 1), 1.0))
+                status.caption(f"{rows_read} rows read, {inserted} inserted, {skipped} duplicates skipped")
 
-            if not response.data:
-                st.error(f"supabase error: {response.error.message}")
+            try:
+                result = import_statement(statement, fmt, default_category, progress=report)
+            except ValueError as e:
+                st.error(f"couldn't read statement: {e}")
             else:
-                st.success("✅ transaction added!")
-                time.sleep(1)
-                st.rerun()
+                progress_bar.progress(1.0)
+                st.success(f"✅ imported {result['inserted']} transactions ({result['skipped']} duplicates skipped)")
 
     st.subheader("manage categories")
 
@@ -155,65 +212,162 @@ def render_transaction_tab(df):
     with st.form("add_tag_form"):
         new_tag = st.text_input("new category")
         new_color = st.color_picker("color", "#000000")
-        tag_submit = st.form_submit_button("add category")
+        tag_submit = st.form_submit_button("add category", disabled=is_offline())
 
         if tag_submit and new_tag:
-            insert_or_update_tag(new_tag.strip(), new_color)
-            st.success(f"✅ category '{new_tag}' added!")
-            time.sleep(1)
+            queue_upsert("tags", {"name": new_tag.strip(), "color": new_color})
+            st.toast(f"✅ category '{new_tag}' added!")
             st.rerun()
 
-    if df.empty:
+    if bounds is None:
+        _still_loading("the transaction list is")
+    elif not bounds:
         st.warning("no transactions to display.")
     else:
-        st.subheader("all transactions")
-        df['date'] = pd.to_datetime(df['date'])
-        min_date = df['date'].min().date()
-        max_date = df['date'].max().date()
-        min_amount = float(df['amount'].min())
-        max_amount = float(df['amount'].max())
-
-        col1, col2 = st.columns(2)
-        with col1:
-            date_range = st.date_input("date range", (min_date, max_date))
-        with col2:
-            st.markdown("**amount range ($)**")
-            min_val_input = st.number_input("min", min_value=min_amount, max_value=max_amount, value=min_amount, step=1.0)
-            max_val_input = st.number_input("max", min_value=min_val_input, max_value=max_amount, value=max_amount, step=1.0)
-
-        tag_filter = st.multiselect("filter by category", list(tags.keys()))
-
-        filtered = df[
-            (df['date'].dt.date >= date_range[0]) &
-            (df['date'].dt.date <= date_range[1]) &
-            (df['amount'] >= min_val_input) &
-            (df['amount'] <= max_val_input)
-        ]
-        if tag_filter:
-            filtered = filtered[filtered['category'].isin(tag_filter)]
-
-        def format_tag(tag):
-            color = tags.get(tag, "#DDDDDD")
-            return f'<span style="background-color:{color}; color:#fff; padding:2px 10px; border-radius:20px; font-size:0.9em;">{tag}</span>'
-
-        styled_df = filtered[['date', 'category', 'description', 'amount', 'type']].copy()
-        styled_df['category'] = styled_df['category'].apply(format_tag)
-        styled_table_html = styled_df.to_html(escape=False, index=False)
-        styled_table_html_clean = styled_table_html.split('<table')[1]
+        _render_transaction_list(bounds, tags)
+
+@st.fragment
+@_recorded("transactions: list")
+def _render_transaction_list(bounds, tags):
+    # a fragment, so filter, sort and paging changes rerun only this section
+    st.subheader("all transactions")
+    min_date = bounds["min_date"]
+    max_date = bounds["max_date"]
+    min_amount = bounds["min_amount"]
+    max_amount = bounds["max_amount"]
+
+    col1, col2 = st.columns(2)
+    with col1:
+        date_range = st.date_input("date range", (min_date, max_date))
+    with col2:
+        st.markdown("**amount range ($)**")
+        min_val_input = st.number_input("min", min_value=min_amount, max_value=max_amount, value=min_amount, step=1.0)
+        max_val_input = st.number_input("max", min_value=min_val_input, max_value=max_amount, value=max_amount, step=1.0)
+
+    tag_filter = st.multiselect("filter by category", list(tags.keys()))
+    search = st.text_input("🔍 search", placeholder="description or category, e.g. grocer", key="transaction_search").strip()
+
+    # the range picker briefly holds a single date while the end is being picked
+    start_date = date_range[0] if date_range else min_date
+    end_date = date_range[1] if len(date_range) > 1 else max_date
+    filters = (start_date, end_date, min_val_input, max_val_input, tuple(tag_filter) or None)
+    total = count_transactions(*filters, search=search or None)
+    if total == 0:
+        st.info("no transactions match these filters.")
+        return
 
+    col1, col2, col3, col4 = st.columns(4)
+    sort_options = ["date", "amount", "category", "description"]
+    sort_by = col1.selectbox("sort by", ["relevance", *sort_options] if search else sort_options)
+    descending = col2.selectbox("order", ["descending", "ascending"]) == "descending"
+    page_size = col3.selectbox("rows per page", [25, 50, 100])
+    page_count = (total - 1) // page_size + 1
+    page = col4.number_input(f"page (of {page_count})", min_value=1, max_value=page_count, value=1,
+                             step=1, key=f"transactions_page_{page_size}_{total}")
+
+    with perf.section("transactions: table"):
+        table_html = _transaction_table_html(filters, search, sort_by, descending, page, page_size, tags)
         st.markdown(
             f"""
             <div style="overflow-x:auto;">
-                <table style="width:100%; border-collapse: collapse;" {styled_table_html_clean}
-                </table>
+                {table_html}
             </div>
             """,
             unsafe_allow_html=True
         )
+    start = (page - 1) * page_size
+    st.caption(f"rows {start + 1}–{min(start + page_size, total)} of {total}")
+    _render_export(filters, search)
+
+def _render_export(filters, search):
+    # the file is only built when asked for: rows stream from the backend page by
+    # page into a temp file, and just the finished file is handed to the download
+    with st.expander("⬇️ export"):
+        col1, col2 = st.columns(2)
+        what = col1.radio("export", ["transactions", "monthly totals"], horizontal=True, key="export_what")
+        fmt = col2.radio("format", FORMATS, index=FORMATS.index("parquet"), horizontal=True, key="export_format")
+        start_month, end_month = str(filters[0])[:7], str(filters[1])[:7]
+        if what == "monthly totals":
+            st.caption(f"month x category totals for {start_month} to {end_month}")
+        if not st.button("prepare export", key="export_prepare"):
+            return
+        with perf.section("transactions: export"), tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, f"export.{fmt}")
+            if what == "transactions":
+                result = export_transactions(path, fmt, *filters, search=search or None)
+                file_name = f"transactions_{filters[0]}_{filters[1]}.{fmt}"
+            else:
+                result = export_rollup(path, fmt, start_month, end_month)
+                file_name = f"monthly_totals_{start_month}_{end_month}.{fmt}"
+            with open(path, "rb") as f:
+                data = f.read()
+        st.download_button(f"💾 download {result['rows']} rows", data, file_name=file_name,
+                           mime=MIME_TYPES[fmt], on_click="ignore", key="export_download")
+
+# --- Transaction Table ---
+# only one page is fetched and rendered, and the html for a page is cached on the
+# filters, sort, page and data version, so reruns that don't touch the table are free.
+TABLE_COLUMNS = ['date', 'category', 'description', 'amount', 'type']
+_table_html_cache = LRUCache(maxsize=64)
+_table_html_lock = threading.Lock()
+
+def _badges(categories, tags):
+    badge_by_tag = {
+        tag: f'<span style="background-color:{tags.get(tag, "#DDDDDD")}; color:#fff; padding:2px 10px; '
+             f'border-radius:20px; font-size:0.9em;">{html.escape(str(tag))}</span>'
+        for tag in categories.dropna().unique()
+    }
+    return categories.astype(object).map(badge_by_tag).fillna("")
+
+def _transaction_table_html(filters, search, sort_by, descending, page, page_size, tags):
+    key = (filters, search, sort_by, descending, page, page_size, data_version("transactions", "tags"))
+    # queued writes don't move the data version, so the page isn't cached until they're sent
+    cacheable = not has_pending_writes("transactions")
+    with _table_html_lock:
+        if cacheable and key in _table_html_cache:
+            return _table_html_cache[key]
+
+    rows = query_transactions(*filters, order=sort_by, desc=descending,
+                              limit=page_size, offset=(page - 1) * page_size, search=search or None)
+    if rows.empty:
+        return "<p>no transactions on this page.</p>"
+    header = "".join(f"<th>{col}</th>" for col in TABLE_COLUMNS)
+    body = (
+        "<tr><td>" + rows['date'].dt.strftime('%Y-%m-%d')
+        + "</td><td>" + _badges(rows['category'], tags)
+        + "</td><td>" + rows['description'].fillna("").astype(str).map(html.escape)
+        + "</td><td>" + (rows['amount_cents'] / 100).map('{:,.2f}'.format)
+        + "</td><td>" + rows['type'].astype(str)
+        + "</td></tr>"
+    )
+    table_html = (
+        '<table style="width:100%; border-collapse: collapse;" border="1" class="dataframe">'
+        f'<thead><tr style="text-align: right;">{header}</tr></thead>'
+        f'<tbody>{"".join(body)}</tbody></table>'
+    )
+    if cacheable:
+        with _table_html_lock:
+            _table_html_cache[key] = table_html
+    return table_html
 
-def render_budget_tab(df, tags):
+@_recorded("budget")
+def render_budget_tab(tags, rollup, month_list):
     st.subheader("monthly budget")
 
+    if tags is None:
+        _still_loading("the budget form is")
+    else:
+        _render_budget_form(tags)
+
+    if rollup is None or month_list is None:
+        _still_loading("budget review is")
+    elif rollup.empty:
+        st.info("no transaction data available to compare with budgets.")
+    else:
+        _render_budget_review(rollup, month_list)
+        _render_budget_trends(rollup, month_list)
+
+def _render_budget_form(tags):
     with st.form("add_budget_form"):
         col1, col2 = st.columns(2)
         now = datetime.datetime.now()
@@ -227,56 +381,34 @@ def render_budget_tab(df, tags):
         category = col2.selectbox("category", options=list(tags.keys()))
 
         budgeted_amount = st.number_input("budgeted amount", min_value=0.0, format="%.2f")
-        budget_submit = st.form_submit_button("add budget")
+        budget_submit = st.form_submit_button("add budget", disabled=is_offline())
 
         if budget_submit:
-            response = insert_budget({
+            queue_insert("budgets", {
                 "month": month.strip(),
                 "category": category.strip(),
                 "amount": budgeted_amount
             })
+            st.toast("✅ budget added!")
+            st.rerun()
 
-            if not response.data:
-                st.error(f"error saving budget: {response.error.message}")
-            else:
-                st.success("✅ budget added!")
-                time.sleep(1)
-                st.rerun()
+@st.fragment
+@_recorded("budget: review")
+def _render_budget_review(rollup, month_list):
+    month_selected = st.selectbox("select month for budget review", month_list, key="budget_month")
+    budget_df = load_budget(month_selected)
 
-    if df.empty:
-        st.info("no transaction data available to compare with budgets.")
+    if budget_df.empty:
+        st.info("no budget set for this month.")
     else:
-        month_list = get_all_budget_months()
-        month_selected = st.selectbox("select month for budget review", month_list, key="budget_month")
-        budget_df = load_budget(month_selected)
-
-        if budget_df.empty:
-            st.info("no budget set for this month.")
-        else:
-            budget_df = (
-                budget_df.rename(columns={"amount": "budgeted_amount"})
-                        .groupby('category', as_index=False)['budgeted_amount']
-                        .sum()
-            )
-
-            filtered = df[df['month'] == month_selected]
-            actuals = (
-                filtered[filtered['type'].str.lower() == 'expense']
-                .groupby('category')['amount']
-                .sum()
-                .reset_index()
-                .rename(columns={'amount': 'actual_spent'})
-            )
+        merged = budget_vs_actual(budget_df, rollup, month_selected)
 
-            merged = pd.merge(budget_df, actuals, on='category', how='left')
-            merged['actual_spent'] = merged['actual_spent'].fillna(0)
-            merged['difference'] = merged['budgeted_amount'] - merged['actual_spent']
+        st.subheader(f"budget vs actual – {month_selected}")
 
-            st.subheader(f"budget vs actual – {month_selected}")
-
-            chart_df = merged.melt(id_vars='category', value_vars=['budgeted_amount', 'actual_spent'],
-                                var_name='Type', value_name='Amount')
+        chart_df = merged.melt(id_vars='category', value_vars=['budgeted_amount', 'actual_spent'],
+                            var_name='Type', value_name='Amount')
 
+        with perf.section("budget: chart"):
             bar = alt.Chart(chart_df).mark_bar().encode(
                 x=alt.X('category:N', title='category'),
                 y=alt.Y('Amount:Q'),
@@ -289,101 +421,173 @@ def render_budget_tab(df, tags):
 
             st.altair_chart(bar, use_container_width=True)
 
-            with st.expander("show budget vs actual table"):
-                st.dataframe(merged[['category', 'budgeted_amount', 'actual_spent', 'difference']])
+        with st.expander("show budget vs actual table"):
+            st.dataframe(merged[['category', 'budgeted_amount', 'actual_spent', 'difference']])
+
+@st.fragment
+@_recorded("budget: trends")
+def _render_budget_trends(rollup, month_list):
+    st.subheader("trends")
+    months = sorted(set(rollup.months()) | set(month_list))
+    if len(months) < 2:
+        st.info("trends need at least two months of data.")
+        return
 
-def render_database_tab(tags):
+    start, end = st.select_slider("months", options=months, value=(months[max(len(months) - 12, 0)], months[-1]),
+                                  key="trend_months")
+    trends = budget_trends(load_budgets(start, end), rollup, start, end)
+    if trends.empty:
+        st.info("no budgets or expenses in these months.")
+        return
+
+    categories = ["all categories"] + sorted(trends['category'].unique())
+    category = st.selectbox("category", categories, key="trend_category")
+    if category != "all categories":
+        trends = trends[trends['category'] == category]
+    totals = monthly_totals(trends)
+
+    with perf.section("budget: trend chart"):
+        lines = totals.melt(id_vars='month', value_vars=['budgeted', 'actual', 'rolling_actual', 'forecast'],
+                            var_name='series', value_name='amount')
+        chart = alt.Chart(lines).mark_line(point=True).encode(
+            x=alt.X('month:O', title='month'),
+            y=alt.Y('amount:Q', title='amount (CAD)'),
+            color=alt.Color('series:N', title=None),
+            tooltip=['month', 'series', alt.Tooltip('amount:Q', format=',.2f')]
+        ).properties(height=350)
+        st.altair_chart(chart, use_container_width=True)
+
+    latest = trends[trends['month'] == end]
+    if not latest.empty:
+        st.markdown(f"**{end} by category**")
+        st.dataframe(
+            latest[['category', 'budgeted', 'actual', 'forecast', 'forecast_difference', 'rolling_actual', 'yoy_delta', 'yoy_pct']],
+            hide_index=True,
+            use_container_width=True,
+            column_config={"yoy_pct": st.column_config.NumberColumn("yoy %", format="percent")},
+        )
+
+# --- Database Tab ---
+# the grid shows one page of the already-loaded table in a single data editor.
+# edits and deletes from every page are collected in session state as a diff and
+# sent to supabase in one batch when committed.
+def _pending_changes(table):
+    pending = st.session_state.setdefault("db_pending", {})
+    return pending.setdefault(table, {"updates": {}, "deletes": set()})
+
+def _grid_column_config(table, tags):
+    config = {"delete": st.column_config.CheckboxColumn("🗑️", width="small")}
+    if table in ("transactions", "budgets"):
+        config["category"] = st.column_config.SelectboxColumn("category", options=list(tags.keys()))
+        config["amount"] = st.column_config.NumberColumn("amount", format="%.2f")
+    if table == "transactions":
+        config["date"] = st.column_config.DateColumn("date")
+        config["type"] = st.column_config.SelectboxColumn("type", options=["expense", "income"])
+    return config
+
+def _page_rows(df, table, pk, start, page_size):
+    page = df.iloc[start:start + page_size].copy()
+    if table == "transactions":
+        page['date'] = pd.to_datetime(page['date']).dt.date
+    page.index = page[pk].tolist()
+    return page
+
+def _record_diff(original, edited, changes):
+    columns = list(original.columns)
+    same = (edited[columns] == original[columns]) | (edited[columns].isna() & original[columns].isna())
+    changed = ~same.all(axis=1)
+    for key in original.index:
+        if changed[key]:
+            changes["updates"][key] = edited.loc[key, columns].to_dict()
+        else:
+            changes["updates"].pop(key, None)
+        if edited.loc[key, "delete"]:
+            changes["deletes"].add(key)
+        else:
+            changes["deletes"].discard(key)
+
+def _commit_changes(table, pk, df, changes):
+    # queued writes are coalesced and sent as one batch per operation; the updates
+    # carry whole rows, so they go out as a single upsert
+    updates = {key: row for key, row in changes["updates"].items() if key not in changes["deletes"]}
+    if updates:
+        base = df.set_index(pk, drop=False).loc[list(updates)]
+        edits = pd.DataFrame.from_dict(updates, orient="index")
+        # assigned rather than update()d, which would skip cells the user cleared
+        base = base.astype(object)
+        base.loc[edits.index, edits.columns] = edits.astype(object)
+        if table == "transactions":
+            base['date'] = base['date'].astype(str)
+        rows = base.astype(object).where(base.notna(), None).to_dict("records")
+        for key, row in zip(updates, rows):
+            queue_update(table, key, row)
+    for key in changes["deletes"]:
+        queue_delete(table, key)
+
+def _reset_grid(table):
+    st.session_state["db_pending"].pop(table, None)
+    for key in [key for key in st.session_state if str(key).startswith(f"grid_{table}_")]:
+        del st.session_state[key]
+
+@st.fragment
+@_recorded("database")
+def render_database_tab(tags, table, df):
+    # df is the prefetched get_table_data(table). a fragment rerun keeps the arguments
+    # of the last full run, so once the selectbox picks another table it's read here
     st.subheader("database management")
 
-    table_selection = st.selectbox("select database", ["transactions", "budgets", "tags"])
-    primary_key_map = {
-        "transactions": "id",
-        "budgets": "id",
-        "tags": "name"
-    }
-    pk = primary_key_map[table_selection]
-    df = get_table_data(table_selection)
+    table_selection = st.selectbox("select database", ["transactions", "budgets", "tags"], key="db_table")
+    pk = PRIMARY_KEYS[table_selection]
+    if table_selection != table:
+        df = get_table_data(table_selection)
 
+    if df is None or tags is None:
+        _still_loading("the table is")
+        return
     if df.empty:
         st.info("no data to display.")
         return
 
-    # show column headers
-    header_cols = st.columns(len(df.columns) + 1)
-    for i, col_name in enumerate(df.columns):
-        header_cols[i].markdown(f"**{col_name}**")
-
-    for _, row in df.iterrows():
-        with st.container():
-            cols = st.columns(len(row) + 1)
-            for i, col in enumerate(row.index):
-                cols[i].write(row[col])
-
-            action_col1, action_col2 = cols[-1].columns(2)
-            edit_key = f"edit_{table_selection}_{row[pk]}"
-            delete_key = f"delete_{table_selection}_{row[pk]}"
-
-            if action_col1.button("✏️", key=edit_key):
-                st.session_state["edit_target"] = (table_selection, row[pk])
-                st.rerun()
-
-            if action_col2.button("🗑️", key=delete_key):
-                st.session_state["delete_target"] = (table_selection, row[pk])
-                st.rerun()
-
-    # edit handler
-    if st.session_state.get("edit_target"):
-        table, edit_id = st.session_state["edit_target"]
-        edit_df = get_table_data(table)
-        edit_row = edit_df[edit_df[pk] == edit_id].iloc[0]
-
-        with st.form("edit_form"):
-            st.markdown(f"### edit entry in `{table}`")
-
-            if table == "transactions":
-                new_date = st.date_input("date", pd.to_datetime(edit_row['date']))
-                new_category = st.selectbox("category", list(tags.keys()), index=list(tags.keys()).index(edit_row['category']) if edit_row['category'] in tags else 0)
-                new_desc = st.text_input("description", value=edit_row['description'])
-                new_amount = st.number_input("amount", value=edit_row['amount'], format="%.2f")
-                new_type = st.selectbox("type", ["expense", "income"], index=0 if edit_row['type'] == "expense" else 1)
-            elif table == "budgets":
-                new_month = st.text_input("month", value=edit_row['month'])
-                new_category = st.selectbox("category", list(tags.keys()), index=list(tags.keys()).index(edit_row['category']) if edit_row['category'] in tags else 0)
-                new_amount = st.number_input("budgeted amount", value=edit_row['amount'], format="%.2f")
-            else:  # tags
-                new_name = st.text_input("category name", value=edit_row['name'])
-                new_color = st.color_picker("color", value=edit_row['color'])
-
-            col1, col2 = st.columns(2)
-            if col1.form_submit_button("update"):
-                if table == "transactions":
-                    update_transaction(edit_id, str(new_date), new_category, new_desc, new_amount, new_type)
-                elif table == "budgets":
-                    update_budget(edit_id, new_month, new_category, new_amount)
-                else:
-                    update_tag(edit_id, new_name.strip(), new_color)
-                st.success("✅ row updated!")
-                st.session_state.pop("edit_target")
-                time.sleep(1)
-                st.rerun()
-
-            if col2.form_submit_button("cancel"):
-                st.session_state.pop("edit_target")
-                st.rerun()
-
-    # delete handler
-    if st.session_state.get("delete_target"):
-        table, delete_id = st.session_state["delete_target"]
-        st.warning(f"are you sure you want to delete row id {delete_id} from `{table}`?")
-        col1, col2 = st.columns(2)
-
-        if col1.button("✅ confirm"):
-            delete_row(table, delete_id)
-            st.success("✅ row deleted!")
-            st.session_state.pop("delete_target")
-            time.sleep(1)
-            st.rerun()
-
-        if col2.button("❌ cancel"):
-            st.session_state.pop("delete_target")
-            st.rerun()
\ No newline at end of file
+    changes = _pending_changes(table_selection)
+
+    col1, col2 = st.columns(2)
+    page_size = col1.selectbox("rows per page", [25, 50, 100, 250], key=f"page_size_{table_selection}")
+    page_count = (len(df) - 1) // page_size + 1
+    page = col2.number_input(f"page (of {page_count})", min_value=1, max_value=page_count, value=1,
+                             step=1, key=f"page_{table_selection}_{page_size}")
+    start = (page - 1) * page_size
+
+    original = _page_rows(df, table_selection, pk, start, page_size)
+    view = original.copy()
+    if changes["updates"]:
+        pending = pd.DataFrame.from_dict(changes["updates"], orient="index")
+        pending = pending[pending.index.isin(view.index)]
+        view.loc[pending.index, pending.columns] = pending
+    view.insert(0, "delete", view.index.isin(changes["deletes"]))
+
+    with perf.section("database: editor"):
+        edited = st.data_editor(
+            view,
+            key=f"grid_{table_selection}_{page_size}_{page}",
+            hide_index=True,
+            disabled=[] if table_selection == "tags" else [pk],
+            column_config=_grid_column_config(table_selection, tags),
+            use_container_width=True,
+        )
+    st.caption(f"rows {start + 1}–{min(start + page_size, len(df))} of {len(df)}")
+    _record_diff(original, edited, changes)
+
+    pending_count = len(changes["updates"]) + len(changes["deletes"])
+    if pending_count:
+        st.info(f"{len(changes['updates'])} edited and {len(changes['deletes'])} deleted row(s) not saved yet.")
+
+    col1, col2 = st.columns(2)
+    if col1.button(f"💾 commit {pending_count} change(s)", disabled=not pending_count or is_offline()):
+        _commit_changes(table_selection, pk, df, changes)
+        _reset_grid(table_selection)
+        st.toast("✅ changes saved!")
+        st.rerun()
+
+    if col2.button("↩️ discard changes", disabled=not pending_count):
+        _reset_grid(table_selection)
+        st.rerun()
@@ -0,0 +1,159 @@
+import itertools
+import numbers
+import threading
+import time
+
+# --- Write-behind queue ---
+# writes are recorded here and shown straight away by overlaying them on the cached
+# frames (see supabase_db), while a background thread flushes them to supabase.
+# writes that arrive within COALESCE_SECONDS of each other are merged, and each
+# table's writes go out in queue order as one batch per run of the same operation.
+# transient failures are retried with backoff; anything else drops the write, and
+# every later write to the row it was inserting, which rolls the overlay back, and
+# is reported to the session that made it.
+COALESCE_SECONDS = 0.3
+MAX_ATTEMPTS = 5
+
+class PendingWrite:
+    def __init__(self, table, op, key, row=None, owner=None):
+        self.table = table
+        self.op = op            # insert, upsert, update or delete
+        self.key = key          # primary key; a negative temp id for id-keyed inserts
+        self.row = row or {}
+        self.owner = owner      # session that made the write, for failure reporting
+        self.attempts = 0
+        self.in_flight = False
+
+class WriteQueue:
+    def __init__(self, flush, is_transient):
+        # flush(table, op, writes) sends one batch; for inserts it returns the keys
+        # supabase assigned, in order, so later writes to a temp id can be remapped
+        self.flush = flush
+        self.is_transient = is_transient
+        self.writes = []
+        self.failures = {}
+        self.temp_ids = itertools.count(1)
+        self.lock = threading.Condition()
+        self.worker = None
+
+    def next_temp_id(self):
+        return -next(self.temp_ids)
+
+    def enqueue(self, write):
+        with self.lock:
+            self._coalesce(write)
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self.worker.start()
+            self.lock.notify()
+
+    def _coalesce(self, write):
+        queued = next((w for w in reversed(self.writes)
+                       if w.table == write.table and w.key == write.key and not w.in_flight), None)
+        if queued is None or write.op in ("insert", "upsert"):
+            self.writes.append(write)
+        elif queued.op == "delete":
+            pass  # the row is going away anyway
+        elif write.op == "update":
+            # an edit of a row that isn't sent yet just changes what gets sent
+            queued.row = {**queued.row, **write.row}
+        elif queued.op == "insert":
+            self.writes.remove(queued)  # deleting a row that was never sent
+        else:
+            self.writes[self.writes.index(queued)] = write
+
+    def pending(self, table):
+        with self.lock:
+            return [w for w in self.writes if w.table == table]
+
+    def pop_failures(self, owner):
+        with self.lock:
+            return self.failures.pop(owner, [])
+
+    def _run(self):
+        while True:
+            with self.lock:
+                while not any(not w.in_flight for w in self.writes):
+                    self.lock.wait()
+            time.sleep(COALESCE_SECONDS)
+            with self.lock:
+                batch = [w for w in self.writes if not w.in_flight]
+                for w in batch:
+                    w.in_flight = True
+            self._flush_batch(batch)
+
+    def _flush_batch(self, batch):
+        tables = {}
+        for write in batch:
+            tables.setdefault(write.table, []).append(write)
+
+        for table, writes in tables.items():
+            # a delete then an upsert of the same key has to reach the server in that order
+            runs = [list(run) for _, run in itertools.groupby(writes, key=lambda w: w.op)]
+            for i, run in enumerate(runs):
+                if not self._flush_run(table, run[0].op, run):
+                    # the rest of the table's writes wait for the failed ones to be sent or dropped
+                    self._release([write for later in runs[i + 1:] for write in later])
+                    break
+
+    def _flush_run(self, table, op, writes):
+        if op != "insert" and any(_is_temp(w.key) for w in writes):
+            # a temp id only becomes a real key once its insert is sent, never send it as one
+            with self.lock:
+                inserting = {w.key for w in self.writes if w.table == table and w.op == "insert"}
+                for write in writes:
+                    if _is_temp(write.key) and write.key not in inserting:
+                        self._drop(write, LookupError(f"{table} row {write.key} was never inserted"))
+            self._release([w for w in writes if _is_temp(w.key) and w.key in inserting])
+            writes = [w for w in writes if not _is_temp(w.key)]
+            if not writes:
+                return False
+        try:
+            keys = self.flush(table, op, writes)
+        except Exception as e:
+            self._failed(writes, e)
+            return False
+        with self.lock:
+            for write in writes:
+                self.writes.remove(write)
+            if op == "insert" and keys and len(keys) == len(writes):
+                real_keys = {write.key: key for write, key in zip(writes, keys)}
+                for write in self.writes:
+                    if write.table == table and write.key in real_keys:
+                        write.key = real_keys[write.key]
+        return True
+
+    def _release(self, writes):
+        # back in the queue for the next batch
+        with self.lock:
+            for write in writes:
+                write.in_flight = False
+            if writes:
+                self.lock.notify()
+
+    def _failed(self, writes, error):
+        retry = []
+        with self.lock:
+            for write in writes:
+                write.attempts += 1
+                if self.is_transient(write.op, error) and write.attempts < MAX_ATTEMPTS:
+                    retry.append(write)
+                else:
+                    self._drop(write, error)
+                    if write.op == "insert" and _is_temp(write.key):
+                        # edits and deletes of a row that will never exist
+                        for later in [w for w in self.writes if w.table == write.table and w.key == write.key]:
+                            self._drop(later, error)
+        if retry:
+            time.sleep(min(0.5 * 2 ** max(w.attempts for w in retry), 8))
+            with self.lock:
+                for write in retry:
+                    write.in_flight = False
+                self.lock.notify()
+
+    def _drop(self, write, error):
+        self.writes.remove(write)
+        self.failures.setdefault(write.owner, []).append((write, error))
+
+def _is_temp(key):
+    return isinstance(key, numbers.Integral) and key < 0
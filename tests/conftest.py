@@ -0,0 +1,52 @@
+import os
+import time
+
+# the app modules read these at import time; tests never touch disk snapshots,
+# a real supabase or background feeds
+os.environ.setdefault("BUDGET_TRACKER_SNAPSHOT", "0")
+os.environ.setdefault("BUDGET_TRACKER_WARM_UP", "0")
+os.environ.setdefault("BUDGET_TRACKER_CHANGE_FEED", "off")
+
+import pytest
+from benchmarks.fake_supabase import FakeSupabase
+from benchmarks.synthetic import generate_transactions, generate_budgets, generate_tags
+from modules import supabase_db as db
+from modules.rollups import MonthlyRollup
+from modules.write_queue import WriteQueue
+
+def make_client(n=300, seed=1, **kwargs):
+    client = FakeSupabase(**kwargs)
+    transactions = generate_transactions(n, seed=seed)
+    client.load("transactions", transactions)
+    client.load("budgets", generate_budgets(transactions, seed=seed))
+    client.load("tags", generate_tags())
+    return client
+
+@pytest.fixture
+def fresh_state(monkeypatch):
+    # a new process-wide transactions frame and write queue for every test
+    monkeypatch.setattr(db, "_transaction_sync", db._TransactionSync())
+    monkeypatch.setattr(db, "_write_queue", WriteQueue(db._flush_writes, db._is_transient))
+    monkeypatch.setattr(db, "_schedule_reconcile", lambda delay=0: None)
+    db._offline.clear()
+    yield
+    db._offline.clear()
+
+@pytest.fixture
+def client(fresh_state):
+    client = make_client()
+    db.set_client(client)
+    return client
+
+def server_rollup(client):
+    # the rollup rebuilt from scratch over what the fake table holds right now
+    rollup = MonthlyRollup()
+    rollup.rebuild(db._prepare_transactions(client.frame("transactions")))
+    return rollup.table.sort_index()
+
+def wait_for_flush(table, timeout=5.0):
+    # blocks until the write-behind queue has sent (or dropped) every write to table
+    deadline = time.monotonic() + timeout
+    while db._write_queue.pending(table):
+        assert time.monotonic() < deadline, f"writes to {table} still pending"
+        time.sleep(0.02)
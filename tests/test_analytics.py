@@ -0,0 +1,18 @@
+import pandas as pd
+from modules import supabase_db as db
+from modules.analytics import budget_trends
+from modules.rollups import MonthlyRollup
+
+def test_trends_skip_months_with_no_budget_and_no_data():
+    rollup = MonthlyRollup()
+    rollup.rebuild(db._prepare_transactions(pd.DataFrame([
+        {"id": 1, "date": "2025-03-04", "category": "food", "description": "", "amount": 40.0, "type": "expense"},
+        {"id": 2, "date": "2025-04-09", "category": "rent", "description": "", "amount": 900.0, "type": "expense"},
+    ])))
+    budgets = pd.DataFrame([{"month": "2025-04", "category": "food", "amount": 50.0}])
+
+    trends = budget_trends(budgets, rollup, "2025-01", "2025-04")
+
+    assert sorted(zip(trends["month"], trends["category"])) == [
+        ("2025-03", "food"), ("2025-04", "food"), ("2025-04", "rent"),
+    ]
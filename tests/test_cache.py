@@ -0,0 +1,6 @@
+from modules import supabase_db as db
+
+def test_cached_rollups_are_sized_by_their_table(client):
+    rollup = db.get_rollup()
+    assert db._sizeof(rollup) == rollup.table.memory_usage(deep=True).sum()
+    assert db._sizeof(rollup) > 1000
@@ -0,0 +1,66 @@
+import time
+import pandas as pd
+import pytest
+from modules import supabase_db as db
+from modules.change_feed import QueueFeed
+from tests.conftest import server_rollup
+
+@pytest.fixture
+def feed(client):
+    feed = QueueFeed()
+    db.load_transactions()
+    db.start_change_feed(feed)
+    yield feed
+    db.stop_change_feed()
+
+def published(feed, *events):
+    # publishes the events and waits for the feed thread to apply them
+    version = db.data_version("transactions")
+    for event in events:
+        feed.publish(*event)
+    deadline = time.monotonic() + 5
+    while db.data_version("transactions") == version:
+        assert time.monotonic() < deadline, "change feed didn't apply the events"
+        time.sleep(0.01)
+
+def test_row_events_are_applied_without_a_delta_load(client, feed):
+    inserted = client.table("transactions").insert(
+        {"date": "2025-12-24", "category": "food", "description": "bakery", "amount": 8.75, "type": "expense"}
+    ).execute().data[0]
+    updated = client.table("transactions").update({"amount": 99.0}).eq("id", 5).execute().data[0]
+    deleted = client.table("transactions").delete().eq("id", 9).execute().data[0]
+    requests = client.requests
+
+    published(feed,
+              ("transactions", "insert", inserted),
+              ("transactions", "update", updated),
+              ("transactions", "delete", None, {"id": deleted["id"]}))
+    frame = db.load_transactions().set_index("id")
+
+    assert client.requests == requests
+    assert frame.loc[inserted["id"], "description"] == "bakery"
+    assert frame.loc[5, "amount_cents"] == 9900
+    assert 9 not in frame.index
+    pd.testing.assert_frame_equal(db.get_rollup().table.sort_index(), server_rollup(client))
+
+def test_events_without_rows_fall_back_to_a_delta_load(client, feed):
+    inserted = client.table("transactions").insert(
+        {"date": "2025-12-24", "category": "food", "description": "bakery", "amount": 8.75, "type": "expense"}
+    ).execute().data[0]
+    client.table("transactions").delete().eq("id", 9).execute()
+    requests = client.requests
+
+    published(feed, ("transactions", "insert", inserted), ("transactions", "changed"))
+    frame = db.load_transactions()
+
+    assert client.requests > requests
+    assert sorted(frame["id"]) == sorted(client.frame("transactions")["id"])
+
+def test_local_writes_after_a_feed_batch_are_read_back(client, feed):
+    updated = client.table("transactions").update({"amount": 99.0}).eq("id", 5).execute().data[0]
+    published(feed, ("transactions", "update", updated))
+    written = db.insert_rows("transactions", [
+        {"date": "2025-12-26", "category": "food", "description": "deli", "amount": 6.5, "type": "expense"},
+    ])
+
+    assert written[0]["id"] in set(db.load_transactions()["id"])
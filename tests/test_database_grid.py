@@ -0,0 +1,45 @@
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+from modules import supabase_db as db
+from modules.ui import _commit_changes
+from tests.conftest import wait_for_flush
+
+def test_commit_sends_cleared_cells(client):
+    df = db.get_table_data("transactions")
+    row = df[df["id"] == 3].iloc[0].to_dict()
+    changes = {"updates": {3: {**row, "description": None, "amount": 12.0}}, "deletes": {4}}
+
+    _commit_changes("transactions", "id", df, changes)
+    wait_for_flush("transactions")
+
+    stored = client.frame("transactions").set_index("id")
+    assert stored.loc[3, "description"] is None
+    assert stored.loc[3, "amount"] == 12.0
+    assert 4 not in stored.index
+
+def _grid_app():
+    # a fragment rerun keeps the last full run's arguments: the transactions frame
+    from modules.supabase_db import load_tags, get_table_data
+    from modules.ui import render_database_tab
+    render_database_tab(load_tags(), "transactions", get_table_data("transactions"))
+
+def test_grid_reads_the_selected_table(client):
+    app = AppTest.from_function(_grid_app, default_timeout=30)
+    app.session_state["db_table"] = "tags"
+    app.run()
+
+    tags = len(client.frame("tags"))
+    assert not app.exception
+    assert [caption.value for caption in app.caption] == [f"rows 1–{tags} of {tags}"]
+
+def test_transactions_grid_comes_from_the_synced_frame(client):
+    db.load_transactions()
+    requests = client.requests
+    grid = db.get_table_data("transactions")
+    assert client.requests == requests
+    pd.testing.assert_frame_equal(grid, db.load_table("transactions"))
+
+    db.upsert_tags({"coffee": "#6F4E37"})
+    requests = client.requests
+    db.get_table_data("transactions")
+    assert client.requests == requests
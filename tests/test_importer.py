@@ -0,0 +1,24 @@
+import io
+from modules import importer
+from modules import supabase_db as db
+
+STATEMENT = b"""date,description,amount
+2025-12-01,corner cafe,-4.50
+2025-12-01,corner cafe,-4.50
+2025-12-02,salary,2500.00
+"""
+
+def test_reimport_from_a_fresh_process_inserts_nothing(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(importer, "CHECKPOINT_DIR", str(tmp_path))
+    snapshot = db._raw_transactions(db.load_transactions())
+    assert importer.import_statement(io.BytesIO(STATEMENT), "csv", "food")["inserted"] == 3
+
+    # a new process starts from a snapshot saved before the first import
+    monkeypatch.setattr(db, "_transaction_sync", db._TransactionSync())
+    monkeypatch.setattr(db, "load_snapshot", lambda table: snapshot)
+    db.invalidate()
+    rows = len(client.frame("transactions"))
+    result = importer.import_statement(io.BytesIO(STATEMENT), "csv", "food")
+
+    assert (result["inserted"], result["skipped"]) == (0, 3)
+    assert len(client.frame("transactions")) == rows
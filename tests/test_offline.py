@@ -0,0 +1,43 @@
+import httpx
+from postgrest.exceptions import APIError
+from modules import supabase_db as db
+
+FILTERS = ("2025-03-01", "2025-06-30", 5.0, 100.0, ("food",))
+
+class Unreachable:
+    def table(self, name):
+        raise httpx.ConnectError("unreachable")
+
+def test_transaction_queries_fall_back_to_the_synced_frame(client):
+    db.load_transactions()
+    online = (
+        db.count_transactions(*FILTERS),
+        db.query_transactions(*FILTERS, order="amount", desc=True, limit=5),
+        db.get_transaction_bounds(),
+    )
+    db._client = Unreachable()
+    db.invalidate("transactions")
+
+    assert db.count_transactions(*FILTERS) == online[0]
+    assert db.is_offline()
+    assert db.query_transactions(*FILTERS, order="amount", desc=True, limit=5)["id"].tolist() == online[1]["id"].tolist()
+    assert db.get_transaction_bounds() == online[2]
+
+class Unavailable:
+    def table(self, name):
+        raise APIError({"message": "service unavailable", "code": "503"})
+
+def test_reconcile_retries_after_any_error(client, monkeypatch):
+    db.load_transactions()
+    scheduled = []
+    monkeypatch.setattr(db, "_schedule_reconcile", scheduled.append)
+    db._client = Unavailable()
+    db._offline.set()
+
+    db._reconcile()
+    assert db.is_offline()
+    assert scheduled == [db.RECONCILE_RETRY_SECONDS]
+
+    db._client = client
+    db._reconcile()
+    assert not db.is_offline()
@@ -0,0 +1,27 @@
+from modules import supabase_db as db
+from tests.conftest import make_client
+
+def test_filtered_reads_cost_a_request_per_page_of_matches(fresh_state, monkeypatch):
+    monkeypatch.setattr(db, "PAGE_SIZE", 100)
+    client = make_client(n=3000)
+    db.set_client(client)
+
+    requests = client.requests
+    df = db.load_table("transactions", filters=lambda query: query.in_("id", [5, 2900]))
+    assert sorted(df["id"]) == [5, 2900]
+    assert client.requests - requests == 1
+
+    requests = client.requests
+    food = db.load_table("transactions", filters=lambda query: query.eq("category", "food"))
+    expected = client.frame("transactions").query("category == 'food'")["id"]
+    assert food["id"].tolist() == expected.tolist()
+    assert client.requests - requests == len(expected) // 100 + 1
+
+def test_whole_table_reads_every_row(fresh_state, monkeypatch):
+    monkeypatch.setattr(db, "PAGE_SIZE", 100)
+    client = make_client(n=3000)
+    db.set_client(client)
+    client.table("transactions").delete().in_("id", list(range(1000, 1400))).execute()
+
+    df = db.load_table("transactions")
+    assert df["id"].tolist() == client.frame("transactions")["id"].tolist()
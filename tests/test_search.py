@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import generate_transactions
+from modules import supabase_db as db
+from modules.search import SearchIndex
+
+QUERIES = ["cafe", "ca", "grocer 3", "food", "rent landlord", "#12", "nothing matches this"]
+
+def transactions(n, seed):
+    df = generate_transactions(n, seed=seed)
+    df.insert(0, "id", np.arange(1, n + 1, dtype="int64"))
+    return df
+
+def assert_same_index(index, df):
+    rebuilt = SearchIndex()
+    rebuilt.rebuild(df)
+    assert index.postings.keys() == rebuilt.postings.keys()
+    for key, ids in rebuilt.postings.items():
+        assert index.postings[key].tolist() == ids.tolist(), key
+    assert index.vocabulary == rebuilt.vocabulary
+    assert index.rows == rebuilt.rows
+    for query in QUERIES:
+        assert index.search(query).tolist() == rebuilt.search(query).tolist(), query
+
+def test_incremental_index_matches_a_rebuild():
+    df = transactions(500, seed=3)
+    index = SearchIndex()
+    index.rebuild(df)
+
+    # inserts, including words the index hasn't seen
+    added = df.tail(20).assign(id=np.arange(501, 521), description="landlord rent refund")
+    index.apply(None, added)
+    df = pd.concat([df, added], ignore_index=True)
+    assert_same_index(index, df)
+
+    # deletes, including the only rows holding some words
+    removed = df[df["id"].isin([3, 77, 250, 501, 502])]
+    index.apply(removed, None)
+    df = df[~df["id"].isin(removed["id"])]
+    assert_same_index(index, df)
+
+    # upserts: rows replaced by new values under the same id
+    before = df[df["id"].isin([10, 11, 503])]
+    after = before.assign(description=["cafe corner", "grocer #3", None], category="food")
+    index.apply(before, after)
+    df = pd.concat([df[~df["id"].isin(before["id"])], after]).sort_values("id", ignore_index=True)
+    assert_same_index(index, df)
+
+def test_search_follows_the_transaction_sync(client):
+    db.search_transactions("cafe")
+    client.table("transactions").insert(
+        {"date": "2025-12-24", "category": "food", "description": "zanzibar cafe", "amount": 8.75, "type": "expense"}
+    ).execute()
+    row = db._raw_transactions(db.load_transactions().iloc[[6]]).iloc[0].to_dict()
+    db.upsert_rows("transactions", [{**row, "description": "zanzibar market"}])
+    db.delete_rows("transactions", [12, 13])
+    db.load_transactions()
+
+    assert_same_index(db._transaction_sync.search_index, db._transaction_sync.frame)
+    assert set(db.search_transactions("zanzibar")["description"]) == {"zanzibar cafe", "zanzibar market"}
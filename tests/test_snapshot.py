@@ -0,0 +1,20 @@
+import time
+import pandas as pd
+from modules import snapshot
+
+def test_snapshot_writes_are_debounced(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_ENABLED", True)
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(snapshot, "SNAPSHOT_INTERVAL_SECONDS", 0.3)
+    saved = []
+    save = snapshot.save_snapshot
+    monkeypatch.setattr(snapshot, "save_snapshot", lambda table, df: (saved.append(len(df)), save(table, df)))
+
+    for n in range(1, 6):
+        snapshot.save_snapshot_async("debounce_test", pd.DataFrame({"id": range(n)}))
+        time.sleep(0.02)
+    time.sleep(0.6)
+
+    # the first frame is saved at once, the burst after it as one write of the latest
+    assert len(saved) <= 2 and saved[-1] == 5
+    assert len(snapshot.load_snapshot("debounce_test")) == 5
@@ -0,0 +1,86 @@
+import pandas as pd
+import pytest
+from modules import supabase_db as db
+from modules.rollups import MonthlyRollup
+from modules.sqlite_backend import SQLiteClient
+from tests.conftest import make_client
+
+FILTERS = ("2025-03-01", "2025-09-30", 5.0, 500.0, ("food", "rent"))
+
+def sqlite_copy(fake):
+    # the same rows, ids included, in a private in-memory database
+    client = SQLiteClient(":memory:")
+    for name in ("transactions", "budgets", "tags"):
+        client.table(name).insert(fake.frame(name).to_dict("records")).execute()
+    return client
+
+@pytest.fixture
+def clients(fresh_state):
+    fake = make_client()
+    return fake, sqlite_copy(fake)
+
+def answers(client):
+    db.set_client(client)
+    db._transaction_sync.reset()  # nothing carried over from the other backend's frame
+    return {
+        "count": db.count_transactions(*FILTERS),
+        "page": db.query_transactions(*FILTERS, order="amount", desc=True, limit=5, offset=2),
+        "all": db.query_transactions(*FILTERS, order="date", desc=False),
+        "bounds": db.get_transaction_bounds(),
+        "rollup": db.get_rollup().table.sort_index(),
+        "budget_months": sorted(db.get_all_budget_months()),
+    }
+
+def test_queries_match_the_fake_backend(clients):
+    fake, sqlite = answers(clients[0]), answers(clients[1])
+
+    assert sqlite["count"] == fake["count"] == len(fake["all"]) > 5
+    assert sqlite["page"]["id"].tolist() == fake["page"]["id"].tolist()
+    assert sqlite["all"]["id"].tolist() == fake["all"]["id"].tolist()
+    assert sqlite["bounds"] == fake["bounds"]
+    pd.testing.assert_frame_equal(sqlite["rollup"], fake["rollup"])
+    assert sqlite["budget_months"] == fake["budget_months"]
+
+def test_sync_follows_writes(clients):
+    client = clients[1]
+    db.set_client(client)
+    db.load_transactions()
+
+    client.table("transactions").delete().in_("id", [3, 50, 120]).execute()
+    db.insert_rows("transactions", [
+        {"date": "2025-12-20", "category": "food", "description": "deli", "amount": 12.5, "type": "expense"},
+    ])
+    rows = db._raw_transactions(db.load_transactions().iloc[:5]).to_dict("records")
+    db.upsert_rows("transactions", [{**row, "amount": row["amount"] + 1, "category": "health"} for row in rows])
+
+    stored = pd.DataFrame(client.table("transactions").select("*").order("id").execute().data)
+    frame = db.load_transactions()
+    assert frame["id"].tolist() == stored["id"].tolist()
+    assert (frame.set_index("id").loc[[row["id"] for row in rows], "category"] == "health").all()
+    rollup = MonthlyRollup()
+    rollup.rebuild(db._prepare_transactions(stored))
+    pd.testing.assert_frame_equal(db.get_rollup().table.sort_index(), rollup.table.sort_index())
+
+def test_builder_compiles_filters_and_paging(clients):
+    client = clients[1]
+    rows = lambda query: [row["id"] for row in query.execute().data]
+    table = lambda: client.table("transactions").select("id")
+
+    assert rows(table().in_("id", [])) == []
+    assert rows(table().in_("id", [4, 2, 9]).neq("id", 2).order("id")) == [4, 9]
+    assert rows(table().gte("id", 10).lt("id", 20).order("id", desc=True).range(2, 5)) == [17, 16, 15]
+    assert rows(table().order("id").limit(3)) == [1, 2, 3]
+    response = client.table("transactions").select("id", count="exact").gt("id", 290).limit(1).execute()
+    assert response.count == 10 and len(response.data) == 1
+    with pytest.raises(ValueError):
+        client.table("transactions").select("id").eq("id; drop table tags", 1).execute()
+
+def test_upsert_updates_on_conflict(clients):
+    client = clients[1]
+    client.table("tags").upsert([{"name": "food", "color": "#123456"}, {"name": "coffee", "color": "#6F4E37"}],
+                                on_conflict="name").execute()
+
+    tags = {row["name"]: row["color"] for row in client.table("tags").select("*").execute().data}
+    assert tags["food"] == "#123456" and tags["coffee"] == "#6F4E37"
+    described = client.table("transactions").select("description").ilike("description", "%CAFE%").execute().data
+    assert described and all("cafe" in row["description"].lower() for row in described)
@@ -0,0 +1,84 @@
+import time
+import pandas as pd
+from modules import supabase_db as db
+from tests.conftest import make_client, server_rollup
+
+def synced(client):
+    db.invalidate("transactions")
+    return db.load_transactions()
+
+def assert_in_sync(client):
+    frame = synced(client)
+    assert sorted(frame["id"]) == sorted(client.frame("transactions")["id"])
+    pd.testing.assert_frame_equal(db.get_rollup().table.sort_index(), server_rollup(client))
+
+def test_delta_reconciles_deletes_made_elsewhere(client):
+    synced(client)
+    ids = client.frame("transactions")["id"].iloc[[3, 50, 120]].tolist()
+    client.table("transactions").delete().in_("id", ids).execute()
+    client.table("transactions").insert([
+        {"date": "2025-12-20", "category": "food", "description": "deli", "amount": 12.5, "type": "expense"},
+    ]).execute()
+    assert_in_sync(client)
+    assert not set(ids) & set(db.load_transactions()["id"])
+
+def test_rollup_follows_writes_through_the_helpers(client):
+    synced(client)
+    db.insert_rows("transactions", [
+        {"date": "2025-11-02", "category": "rent", "description": "landlord", "amount": 1800.0, "type": "expense"},
+        {"date": "2025-11-03", "category": "food", "description": "cafe", "amount": 4.25, "type": "expense"},
+    ])
+    rows = db._raw_transactions(db.load_transactions().iloc[:5]).to_dict("records")
+    db.upsert_rows("transactions", [{**row, "amount": row["amount"] + 1, "category": "health"} for row in rows])
+    db.delete_rows("transactions", db.load_transactions()["id"].iloc[10:20].tolist())
+    assert_in_sync(client)
+
+def test_dirty_ids_are_fetched_in_chunks(client, monkeypatch):
+    monkeypatch.setattr(db, "BATCH_SIZE", 10)
+    synced(client)
+    ids = client.frame("transactions")["id"].iloc[:35].tolist()
+    db.delete_rows("transactions", ids)
+    assert_in_sync(client)
+    assert not db._transaction_sync.dirty_ids
+
+def test_updated_at_delta_is_paged(fresh_state, monkeypatch):
+    client = make_client(max_rows=50)
+    client.tables["transactions"]["updated_at"] = "2025-01-01T00:00:00"
+    db.set_client(client)
+    monkeypatch.setattr(db, "PAGE_SIZE", 50)
+    synced(client)
+
+    # more rows than one response can hold change behind this process's back
+    edited = client.frame("transactions")["id"].iloc[::2].tolist()[:120]
+    client.table("transactions").update({"category": "health", "updated_at": "2025-02-01T00:00:00"}) \
+        .in_("id", edited).execute()
+    frame = synced(client)
+    assert (frame.loc[frame["id"].isin(edited), "category"] == "health").all()
+    assert_in_sync(client)
+
+def test_full_reload_without_updated_at(client, monkeypatch):
+    monkeypatch.setattr(db, "FULL_RELOAD_SECONDS", 0.05)
+    synced(client)
+    edited = int(client.frame("transactions")["id"].iloc[7])
+    client.table("transactions").update({"description": "edited elsewhere"}).eq("id", edited).execute()
+
+    assert not db._transaction_sync.reload_due()
+    time.sleep(0.1)
+    assert db._transaction_sync.reload_due()
+    frame = synced(client)
+    assert frame.loc[frame["id"] == edited, "description"].item() == "edited elsewhere"
+    assert not db._transaction_sync.reload_due()
+
+def test_rows_committed_below_the_id_watermark_are_fetched(client):
+    # another writer's transaction took id 150 but committed after this process
+    # had already synced past it
+    late = client.frame("transactions").query("id == 150").to_dict("records")
+    client.table("transactions").delete().eq("id", 150).execute()
+    synced(client)
+    client.table("transactions").upsert(late).execute()
+
+    assert 150 in set(synced(client)["id"])
+    assert_in_sync(client)
+    requests = client.requests
+    synced(client)
+    assert client.requests - requests == 2  # new ids and the count, no id scan
@@ -0,0 +1,127 @@
+import time
+from postgrest.exceptions import APIError
+from modules import supabase_db as db
+from tests.conftest import wait_for_flush
+
+NEW_ROW = {"date": "2025-06-01", "category": "food", "description": "market", "amount": 12.5, "type": "expense"}
+
+def stored(client, table, key, pk="id"):
+    df = client.frame(table)
+    rows = df[df[pk] == key]
+    return rows.iloc[0].to_dict() if len(rows) else None
+
+def in_flight(key, timeout=2.0):
+    # waits until the queued write to key has been picked up by the flush thread
+    deadline = time.monotonic() + timeout
+    while not any(write.key == key and write.in_flight for write in db._write_queue.pending("transactions")):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_update_before_flush_changes_the_insert(client):
+    before = len(client.frame("transactions"))
+    temp_id = db.queue_insert("transactions", NEW_ROW)
+    db.queue_update("transactions", temp_id, {"description": "farmers market"})
+    wait_for_flush("transactions")
+
+    df = client.frame("transactions")
+    assert len(df) == before + 1
+    assert df.iloc[-1]["description"] == "farmers market"
+    assert df.iloc[-1]["amount"] == 12.5
+
+def test_delete_before_flush_never_reaches_the_server(client):
+    before = len(client.frame("transactions"))
+    requests = client.requests
+    temp_id = db.queue_insert("transactions", NEW_ROW)
+    db.queue_delete("transactions", temp_id)
+    wait_for_flush("transactions")
+
+    assert len(client.frame("transactions")) == before
+    assert client.requests == requests
+
+def test_update_to_a_temp_id_waits_for_its_insert(client):
+    client.latency = 0.3
+    temp_id = db.queue_insert("transactions", NEW_ROW)
+    in_flight(temp_id)
+    # the grid's row for a pending insert shows, and sends back, its temp id
+    db.queue_update("transactions", temp_id, {**NEW_ROW, "id": temp_id, "description": "edited"})
+    wait_for_flush("transactions")
+
+    df = client.frame("transactions")
+    assert (df["id"] > 0).all()
+    assert df.iloc[-1]["description"] == "edited"
+
+def test_queued_updates_flush_as_one_request(client):
+    rows = client.frame("transactions").head(20).to_dict("records")
+    wait_for_flush("transactions")
+    requests = client.requests
+    for row in rows:
+        db.queue_update("transactions", row["id"], {**row, "description": f"note {row['id']}"})
+    wait_for_flush("transactions")
+
+    assert client.requests == requests + 1
+    assert stored(client, "transactions", rows[5]["id"])["description"] == f"note {rows[5]['id']}"
+
+def test_tag_rename_changes_the_key(client):
+    color = stored(client, "tags", "food", "name")["color"]
+    db.queue_update("tags", "food", {"name": "groceries", "color": color})
+    wait_for_flush("tags")
+
+    assert stored(client, "tags", "food", "name") is None
+    assert stored(client, "tags", "groceries", "name")["color"] == color
+
+def test_rejected_write_is_reported_and_rolled_back(client, monkeypatch):
+    row = stored(client, "transactions", 7)
+    table = client.table
+
+    def rejecting(name):
+        query = table(name)
+        query.upsert = query.update = query.insert = query.delete = reject
+        return query
+
+    def reject(*args, **kwargs):
+        raise APIError({"message": "new row violates row-level security policy", "code": "42501"})
+
+    monkeypatch.setattr(client, "table", rejecting)
+    db.queue_update("transactions", 7, {**row, "description": "not allowed"})
+    assert db.get_table_data("transactions").set_index("id").loc[7, "description"] == "not allowed"
+    wait_for_flush("transactions")
+
+    failures = db.pop_failed_writes()
+    assert [(write.op, write.key) for write, _ in failures] == [("update", 7)]
+    assert isinstance(failures[0][1], APIError)
+    assert failures[0][0].attempts == 1  # a rejected write isn't retried
+    assert db.pop_failed_writes() == []
+    assert stored(client, "transactions", 7)["description"] == row["description"]
+    assert db.get_table_data("transactions").set_index("id").loc[7, "description"] == row["description"]
+
+def test_writes_to_a_table_keep_their_order(client):
+    db.queue_upsert("tags", {"name": "food", "color": "#111111"})
+    db.queue_delete("tags", "rent")
+    db.queue_upsert("tags", {"name": "rent", "color": "#222222"})
+    wait_for_flush("tags")
+
+    assert stored(client, "tags", "food", "name")["color"] == "#111111"
+    assert stored(client, "tags", "rent", "name")["color"] == "#222222"
+
+def test_rejected_insert_drops_the_edits_to_its_temp_id(client, monkeypatch):
+    table = client.table
+
+    def rejecting(name):
+        query = table(name)
+        query.insert = reject
+        return query
+
+    def reject(*args, **kwargs):
+        time.sleep(0.3)
+        raise APIError({"message": "new row violates check constraint", "code": "23514"})
+
+    monkeypatch.setattr(client, "table", rejecting)
+    before = len(client.frame("transactions"))
+    temp_id = db.queue_insert("transactions", NEW_ROW)
+    in_flight(temp_id)
+    db.queue_update("transactions", temp_id, {**NEW_ROW, "id": temp_id, "description": "edited"})
+    wait_for_flush("transactions")
+
+    assert len(client.frame("transactions")) == before
+    assert (client.frame("transactions")["id"] > 0).all()
+    assert sorted(write.op for write, _ in db.pop_failed_writes()) == ["insert", "update"]